@@ -0,0 +1,223 @@
+"""
+In-memory stand-in for the slice of aio-pika the Worker uses.
+
+Good enough to drive `Worker.run()` without RabbitMQ: topic-ish exact routing,
+per-channel prefetch, ack/reject/nack with requeue, and consumer callbacks
+scheduled as tasks the way aio-pika does it.
+"""
+import asyncio
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Awaitable, Callable, Deque, Dict, List
+
+from aio_pika.exceptions import ChannelNotFoundEntity
+
+
+class InMemoryMessage:
+    def __init__(self, routing_key: str, body: bytes, *, priority: int | None = None,
+                 headers: dict | None = None, message_id: str | None = None) -> None:
+        self.routing_key = routing_key
+        self.body = body
+        self.priority = priority
+        self.headers = headers or {}
+        self.message_id = message_id
+        self.redelivered = False
+        self.processed = False  # settled since it was last delivered
+        self.published_at = time.perf_counter()
+        self.settled_at: float | None = None
+        self.outcome: str | None = None  # ack | reject | requeue
+        self._channel: "InMemoryChannel | None" = None
+        self._queue: "InMemoryQueue | None" = None
+
+    async def ack(self, multiple: bool = False) -> None:
+        self._settle("ack")
+
+    async def reject(self, requeue: bool = False) -> None:
+        self._settle("requeue" if requeue else "reject")
+
+    async def nack(self, multiple: bool = False, requeue: bool = True) -> None:
+        self._settle("requeue" if requeue else "reject")
+
+    @asynccontextmanager
+    async def process(self, requeue: bool = False, reject_on_redelivered: bool = False,
+                      ignore_processed: bool = False):
+        try:
+            yield self
+        except BaseException:
+            if not self.processed:
+                await self.reject(requeue=requeue)
+            raise
+        else:
+            if not self.processed:
+                await self.ack()
+
+    def _settle(self, outcome: str) -> None:
+        if self.outcome is not None:
+            return
+        self.outcome = outcome
+        self.processed = True
+        self.settled_at = time.perf_counter()
+        channel, queue = self._channel, self._queue
+        if channel is not None:
+            channel._release()
+        if outcome == "requeue" and queue is not None:
+            self.outcome = None
+            self.redelivered = True
+            queue._put(self, front=True)
+
+
+class InMemoryQueue:
+    def __init__(self, broker: "InMemoryBroker", name: str, arguments: dict | None = None) -> None:
+        self.broker = broker
+        self.name = name
+        self.arguments = arguments or {}
+        self._messages: Deque[InMemoryMessage] = deque()
+        self._consumers: Dict[str, asyncio.Task] = {}
+        self._ready = asyncio.Event()
+
+    async def bind(self, exchange, routing_key: str = "", **_kwargs) -> None:
+        name = exchange if isinstance(exchange, str) else exchange.name
+        self.broker._bind(name, routing_key, self)
+
+    async def unbind(self, exchange, routing_key: str = "", **_kwargs) -> None:
+        name = exchange if isinstance(exchange, str) else exchange.name
+        queues = self.broker._bindings.get((name, routing_key), [])
+        if self in queues:
+            queues.remove(self)
+
+    async def delete(self, **_kwargs) -> None:
+        for queues in self.broker._bindings.values():
+            if self in queues:
+                queues.remove(self)
+        self.broker.queues.pop(self.name, None)
+
+    @property
+    def declaration_result(self) -> SimpleNamespace:
+        return SimpleNamespace(message_count=len(self._messages), consumer_count=len(self._consumers))
+
+    async def consume(self, callback: Callable[[InMemoryMessage], Awaitable[None]],
+                      no_ack: bool = False, **_kwargs) -> str:
+        channel = self.broker._current_channel(self)
+        tag = f"ctag-{next(self.broker._tags)}"
+        self._consumers[tag] = asyncio.create_task(self._dispatch(channel, callback))
+        return tag
+
+    async def cancel(self, consumer_tag: str, **_kwargs) -> None:
+        task = self._consumers.pop(consumer_tag, None)
+        if task is not None:
+            task.cancel()
+
+    def _put(self, message: InMemoryMessage, *, front: bool = False) -> None:
+        message._queue = self
+        if front:
+            self._messages.appendleft(message)
+        else:
+            self._messages.append(message)
+        self._ready.set()
+
+    async def _dispatch(self, channel: "InMemoryChannel", callback) -> None:
+        while True:
+            while not self._messages:
+                self._ready.clear()
+                await self._ready.wait()
+            await channel._acquire()
+            if not self._messages:
+                channel._release()
+                continue
+            message = self._messages.popleft()
+            message._channel = channel
+            message.processed = False
+            asyncio.create_task(callback(message))
+
+
+class InMemoryExchange:
+    def __init__(self, broker: "InMemoryBroker", name: str) -> None:
+        self.broker = broker
+        self.name = name
+
+
+class InMemoryChannel:
+    def __init__(self, broker: "InMemoryBroker") -> None:
+        self.broker = broker
+        self.is_closed = False
+        self._prefetch = 0
+        self._unacked = 0
+        self._slot = asyncio.Condition()
+
+    async def set_qos(self, prefetch_count: int = 0, **_kwargs) -> None:
+        self._prefetch = prefetch_count
+
+    async def declare_exchange(self, name: str, *_args, **_kwargs) -> InMemoryExchange:
+        return self.broker.exchanges.setdefault(name, InMemoryExchange(self.broker, name))
+
+    async def declare_queue(self, name: str | None = None, *, arguments: dict | None = None,
+                            passive: bool = False, **_kwargs) -> InMemoryQueue:
+        name = name or f"amq.gen-{next(self.broker._tags)}"
+        queue = self.broker.queues.get(name)
+        if queue is None and passive:
+            self.is_closed = True  # a 404 closes the channel, as on RabbitMQ
+            raise ChannelNotFoundEntity(f"no queue '{name}'")
+        if queue is None:
+            queue = self.broker.queues[name] = InMemoryQueue(self.broker, name, arguments)
+        self.broker._owners[name] = self
+        return queue
+
+    async def close(self) -> None:
+        self.is_closed = True
+
+    async def _acquire(self) -> None:
+        async with self._slot:
+            await self._slot.wait_for(lambda: not self._prefetch or self._unacked < self._prefetch)
+            self._unacked += 1
+
+    def _release(self) -> None:
+        self._unacked -= 1
+
+        async def _notify() -> None:
+            async with self._slot:
+                self._slot.notify_all()
+
+        asyncio.get_running_loop().create_task(_notify())
+
+
+class InMemoryConnection:
+    def __init__(self, broker: "InMemoryBroker") -> None:
+        self.broker = broker
+        self.is_closed = False
+
+    async def channel(self, *_args, **_kwargs) -> InMemoryChannel:
+        return InMemoryChannel(self.broker)
+
+    async def close(self) -> None:
+        self.is_closed = True
+
+
+class InMemoryBroker:
+    """Holds queues/bindings and publishes straight into bound queues."""
+
+    def __init__(self) -> None:
+        self.exchanges: Dict[str, InMemoryExchange] = {}
+        self.queues: Dict[str, InMemoryQueue] = {}
+        self.published: List[InMemoryMessage] = []
+        self._bindings: Dict[tuple[str, str], List[InMemoryQueue]] = {}
+        self._owners: Dict[str, InMemoryChannel] = {}
+        self._tags = itertools.count(1)
+
+    async def connect_robust(self, *_args, **_kwargs) -> InMemoryConnection:
+        return InMemoryConnection(self)
+
+    def publish(self, exchange: str, message: InMemoryMessage) -> None:
+        self.published.append(message)
+        for queue in self._bindings.get((exchange, message.routing_key), []):
+            queue._put(message)
+
+    def _bind(self, exchange: str, routing_key: str, queue: InMemoryQueue) -> None:
+        queues = self._bindings.setdefault((exchange, routing_key), [])
+        if queue not in queues:
+            queues.append(queue)
+
+    def _current_channel(self, queue: InMemoryQueue) -> InMemoryChannel:
+        return self._owners[queue.name]
@@ -0,0 +1,54 @@
+"""
+Worker startup import check — fails when startup regresses.
+
+Imports `worker.worker` in a fresh interpreter, the way a new ECS task starts,
+and exits non-zero if that pulls in the agent stack (which listeners load
+lazily on their first message) or takes longer than the budget:
+
+    python -m benchmarks.import_budget --budget 1.5
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Only a listener's first message may import these
+HEAVY_MODULES = ("pydantic_ai", "boto3", "googleapiclient")
+
+_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import worker.worker
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure() -> dict:
+    out = subprocess.run([sys.executable, "-c", _PROBE], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=1.5, help="seconds allowed for `import worker.worker`")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters; the fastest run is judged")
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.repeat)]
+    seconds = min(r["seconds"] for r in runs)
+    loaded = sorted({m for r in runs for m in r["loaded"]})
+    print(f"import worker.worker: {seconds:.3f}s (budget {args.budget:g}s)")
+
+    failures = []
+    if loaded:
+        failures.append(f"startup imported {', '.join(loaded)}; these must load lazily with their listener")
+    if seconds > args.budget:
+        failures.append(f"startup took {seconds:.3f}s, over the {args.budget:g}s budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
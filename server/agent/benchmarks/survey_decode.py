@@ -0,0 +1,158 @@
+"""
+Survey decode benchmark — no S3 required.
+
+Builds a synthetic gzipped survey (by default 10k crosstabs) and times each
+way of turning it into a `Survey`, every one in a fresh subprocess so the peak
+RSS it reports belongs to that decode alone:
+
+    legacy         BytesIO + GzipFile.read + decode + json.loads + model_validate
+    validate_json  gzip.decompress + model_validate_json
+    current        gzip.decompress + json.loads + crosstabs validated one at a
+                   time, each turned into a CrosstabTable (what the datasource does)
+
+    python -m benchmarks.survey_decode --crosstabs 10000 --repeat 3
+"""
+import argparse
+import gzip
+import io
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+from service.data.datasource import _parse_survey_data
+from service.data.models.survey import Survey
+
+
+def _legacy(body: bytes) -> Survey:
+    with gzip.GzipFile(fileobj=io.BytesIO(body)) as gz:
+        survey_json = json.loads(gz.read().decode())
+    survey = Survey.model_validate(survey_json)
+    survey.remove_subtotals()
+    return survey
+
+
+def _validate_json(body: bytes) -> Survey:
+    survey = Survey.model_validate_json(gzip.decompress(body))
+    survey.remove_subtotals()
+    return survey
+
+
+def _current(body: bytes) -> Survey:
+    return _parse_survey_data(body)
+
+
+METHODS: Dict[str, Callable[[bytes], Survey]] = {
+    "legacy": _legacy,
+    "validate_json": _validate_json,
+    "current": _current,
+}
+
+
+def make_survey(questions: int, crosstabs: int, answers: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    labels = [f"Answer option number {i}" for i in range(answers)]
+
+    def pct() -> float:
+        return round(rng.uniform(0, 100), 4)
+
+    topline = [
+        {
+            "question_number": q,
+            "question_varname": f"Q{q}",
+            "question_text": f"Question {q}: how do you feel about the thing being asked here?",
+            "survey_answers": [
+                {"answer_number": i, "answer_text": label, "percentage": pct(), "is_subtotal": i == answers - 1}
+                for i, label in enumerate(labels)
+            ],
+        }
+        for q in range(questions)
+    ]
+    crosstab = []
+    for _ in range(crosstabs):
+        v, h = rng.randrange(questions), rng.randrange(questions)
+        crosstab.append({
+            "vertical_varname": f"Q{v}",
+            "vertical_question": topline[v]["question_text"],
+            "horizontal_varname": f"Q{h}",
+            "horizontal_question": topline[h]["question_text"],
+            "crosstab_answers": [
+                {
+                    "vertical_answer": va,
+                    "is_subtotal_vertical": i == answers - 1,
+                    "horizontal_answer": ha,
+                    "is_subtotal_horizontal": j == answers - 1,
+                    "percentage": pct(),
+                }
+                for i, va in enumerate(labels)
+                for j, ha in enumerate(labels)
+            ],
+        })
+    return {
+        "name": "Synthetic survey",
+        "kbid": "bench",
+        "project_number": 1,
+        "survey_topline": topline,
+        "survey_crosstab": crosstab,
+    }
+
+
+def _child(method: str, path: str) -> None:
+    body = Path(path).read_bytes()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    survey = METHODS[method](body)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    assert survey.survey_crosstab
+    # ru_maxrss is in KiB on Linux
+    print(json.dumps({"seconds": elapsed, "peak_rss_mib": peak / 1024, "added_rss_mib": (peak - baseline) / 1024}))
+
+
+def run(method: str, path: Path) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.survey_decode", "--child", method, str(path)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=150)
+    parser.add_argument("--crosstabs", type=int, default=10_000)
+    parser.add_argument("--answers", type=int, default=5, help="answer options per question")
+    parser.add_argument("--repeat", type=int, default=3, help="subprocess runs per method")
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=list(METHODS))
+    parser.add_argument("--child", nargs=2, metavar=("METHOD", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child)
+        return
+
+    raw = json.dumps(make_survey(args.questions, args.crosstabs, args.answers)).encode()
+    body = gzip.compress(raw)
+    print(f"survey: {args.questions} questions, {args.crosstabs} crosstabs, "
+          f"{len(raw) / 2**20:.1f} MiB JSON, {len(body) / 2**20:.1f} MiB gzipped")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "survey_data.json.gz"
+        path.write_bytes(body)
+        del raw, body
+        print(f"  {'':14}{'best s':>9}{'median s':>10}{'peak RSS MiB':>14}{'added MiB':>11}")
+        for method in args.methods:
+            results = [run(method, path) for _ in range(args.repeat)]
+            seconds = sorted(r["seconds"] for r in results)
+            print(f"  {method:14}{seconds[0]:9.2f}{seconds[len(seconds) // 2]:10.2f}"
+                  f"{min(r['peak_rss_mib'] for r in results):14.0f}"
+                  f"{min(r['added_rss_mib'] for r in results):11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Worker throughput benchmark — no RabbitMQ, Bedrock or Google required.
+
+Replays synthetic `task.*` messages through the real `Worker` and `HANDLERS`,
+with aio-pika swapped for an in-memory broker and the agents, Google backends,
+survey loading and Consultant API callbacks replaced by fakes that sleep for
+configurable latencies.
+
+    python -m benchmarks.worker_throughput --messages 200 --max-in-flight 1 2 4
+
+Reports throughput, queue wait and handler latency percentiles (overall and per
+routing key) and event-loop lag for each pool size.
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from contextlib import ExitStack, asynccontextmanager
+from dataclasses import dataclass
+from importlib import import_module
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+from unittest import mock
+
+import aio_pika
+
+from config import settings
+from runtime import run_blocking
+from worker.listeners import HANDLERS
+from worker.priority import priority_of
+from worker.worker import Worker
+from .broker import InMemoryBroker, InMemoryMessage
+
+
+@dataclass
+class Latency:
+    llm: float = 0.2          # one Bedrock agent run
+    google: float = 0.1       # one blocking googleapiclient .execute()
+    s3: float = 0.2           # survey download + parse (blocking)
+    callback: float = 0.02    # one Consultant API call
+    reporting: float = 0.5    # Reporting API export
+    cpu_ms: float = 2.0       # CPU spent on the loop per agent call (prompt assembly, parsing)
+    jitter: float = 0.25      # +/- fraction applied to every sleep
+
+    def _j(self, seconds: float) -> float:
+        return max(0.0, seconds * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    async def llm_call(self) -> None:
+        end = time.perf_counter() + self.cpu_ms / 1000
+        while time.perf_counter() < end:
+            pass
+        await asyncio.sleep(self._j(self.llm))
+
+    def blocking(self, seconds: float) -> None:
+        time.sleep(self._j(seconds))
+
+    async def google_call(self) -> None:
+        await run_blocking(self.blocking, self.google)
+
+
+LAT = Latency()
+SLIDES_PER_DECK = 6
+CHARTS_PER_SLIDE = 1
+SHEETS_CALLS_PER_CHART = 4
+
+
+# ── Fakes ────────────────────────────────────────────────────────────────────
+def _usage():
+    return SimpleNamespace(input_tokens=1000, output_tokens=200, requests=0)
+
+
+class FakeSurveyToInsightsAgent:
+    def __init__(self, kbid, key_number, progress_callback=None, **_kwargs):
+        LAT.blocking(LAT.s3)
+        self.progress_callback = progress_callback
+        self.usage = _usage()
+
+    async def get_insights(self, focuses=None, insights_per_focus=3):
+        count = (3 if focuses is None else len(focuses)) * insights_per_focus
+        if self.progress_callback:
+            self.progress_callback.reset_progress_total(count)
+        if focuses is None:
+            await LAT.llm_call()
+        insights = []
+        for i in range(count):
+            await LAT.llm_call()
+            if self.progress_callback:
+                self.progress_callback.increment_progress()
+            insights.append(f"insight {i}")
+        return insights
+
+
+class FakeInsightsToMemoAgent:
+    def __init__(self, kbid, key_number, memo_doc_id, progress_callback=None, **_kwargs):
+        LAT.blocking(LAT.s3)
+        self.progress_callback = progress_callback
+        self.usage = _usage()
+
+    async def create_memo_from_insights(self, insights, focus=None):
+        self.progress_callback.reset_progress_total(len(insights) + 1)
+        for _ in insights:
+            await LAT.llm_call()
+            self.progress_callback.increment_progress()
+        await LAT.llm_call()
+        await LAT.google_call()
+
+
+class FakeMemoToSlidesAgent:
+    def __init__(self, kbid, key_number, memo_doc_id, slides_id, sheets_id, progress_callback=None, **_kwargs):
+        LAT.blocking(LAT.s3)
+        LAT.blocking(LAT.google)  # memo read
+        self.progress_callback = progress_callback
+        self.usage = _usage()
+
+    async def create_slides_from_memo(self, outline_focus=None):
+        await LAT.llm_call()
+        self.progress_callback.reset_progress_total(SLIDES_PER_DECK)
+        for _ in range(SLIDES_PER_DECK):
+            await LAT.llm_call()
+            for _ in range(CHARTS_PER_SLIDE):
+                await LAT.llm_call()
+                for _ in range(SHEETS_CALLS_PER_CHART):
+                    await LAT.google_call()
+            await LAT.google_call()
+            self.progress_callback.increment_progress()
+        return self.usage
+
+
+class FakeTaskState:
+    def __init__(self, task_id):
+        self.task_id = task_id
+        self.artifacts = []
+
+    @staticmethod
+    def get_current_timestamp():
+        return "1970-01-01T00:00:00+00:00"
+
+    def add_artifact(self, a):
+        self.artifacts.append(a)
+
+    async def add_large_artifact(self, a):
+        self.artifacts.append(a)
+
+    def reset_progress_total(self, total):
+        pass
+
+    def increment_progress(self):
+        pass
+
+    def timings(self):
+        return {}
+
+    async def request(self, method, path, **kwargs):
+        await asyncio.sleep(LAT._j(LAT.callback))
+        return SimpleNamespace(json=lambda: {"id": 1}, status_code=200)
+
+
+@asynccontextmanager
+async def FakeTaskManager(task_id):
+    state = FakeTaskState(task_id)
+    started = asyncio.ensure_future(state.request("PATCH", f"/Tasks/{task_id}"))
+    yield state
+    await started
+    for _ in state.artifacts:
+        await state.request("POST", f"/Tasks/{task_id}/artifacts")
+    await state.request("PATCH", f"/Tasks/{task_id}")
+
+
+def fake_get_project_data(kbid):
+    LAT.blocking(LAT.callback)
+    return SimpleNamespace(kbid=kbid)
+
+
+async def fake_update_project(kbid, key_number=0):
+    await asyncio.sleep(LAT._j(LAT.reporting))
+    await run_blocking(LAT.blocking, LAT.s3)
+    survey = SimpleNamespace(model_dump=lambda: {})
+    upload = SimpleNamespace(model_dump=lambda: {"s3_key": "bench", "bytes": 0})
+    return survey, upload
+
+
+FAKES = {
+    "SurveyToInsightsAgent": FakeSurveyToInsightsAgent,
+    "InsightsToMemoAgent": FakeInsightsToMemoAgent,
+    "MemoToSlidesAgent": FakeMemoToSlidesAgent,
+    "TaskManager": FakeTaskManager,
+    "get_project_data": fake_get_project_data,
+    "update_project": fake_update_project,
+}
+
+
+def install_fakes(stack: ExitStack) -> None:
+    for handler in HANDLERS.values():
+        mod = import_module(handler.module)
+        for name, fake in FAKES.items():
+            if hasattr(mod, name):
+                stack.enter_context(mock.patch.object(mod, name, fake))
+
+
+# ── Synthetic messages ───────────────────────────────────────────────────────
+def make_body(routing_key: str, task_id: int) -> bytes:
+    base = {"task_id": task_id, "project_id": 1, "kbid": "recBENCH", "key_number": 0}
+    if routing_key == "task.insights":
+        if random.random() < 0.5:
+            base["number_of_insights"] = 1
+            base["focus"] = "bench"
+    elif routing_key == "task.memo":
+        base.update(memo_id=1, doc_id="doc", insights=[f"insight {i}" for i in range(6)])
+    elif routing_key == "task.slides":
+        base.update(slidedeck_id=1, doc_id="doc", sheets_id="sheets", presentation_id="slides")
+    return json.dumps(base).encode()
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        rk = name if name.startswith("task.") else f"task.{name}"
+        mix[rk] = float(weight or 1)
+    return mix
+
+
+# ── Measurement ──────────────────────────────────────────────────────────────
+def pct(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def _sample_lag(samples: List[float], stop: asyncio.Event, interval: float = 0.01) -> None:
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - t0 - interval))
+
+
+async def run_once(pool_size: int, args) -> dict:
+    broker = InMemoryBroker()
+    started: Dict[bytes, float] = {}
+    finished: Dict[bytes, float] = {}
+
+    originals = dict(HANDLERS)
+
+    def _timed(handler):
+        async def _wrapped(body):
+            started[body] = time.perf_counter()
+            try:
+                return await handler(body)
+            finally:
+                finished[body] = time.perf_counter()
+        return _wrapped
+
+    lag: List[float] = []
+    stop_lag = asyncio.Event()
+    with tempfile.TemporaryDirectory() as state_dir, ExitStack() as stack:
+        stack.enter_context(mock.patch.object(aio_pika, "connect_robust", broker.connect_robust))
+        stack.enter_context(mock.patch.object(settings, "WORKER_STATE_DIR", Path(state_dir)))
+        stack.enter_context(mock.patch.dict(HANDLERS, {rk: _timed(h) for rk, h in originals.items()}))
+
+        worker = Worker(concurrency={rk: pool_size for rk in HANDLERS}, metrics_port=0)
+        run_task = asyncio.create_task(worker.run())
+        while sum(len(q._consumers) for q in broker.queues.values()) < len(HANDLERS):
+            await asyncio.sleep(0.001)
+        lag_task = asyncio.create_task(_sample_lag(lag, stop_lag))
+
+        mix = parse_mix(args.mix)
+        keys, weights = list(mix), list(mix.values())
+        t0 = time.perf_counter()
+        for task_id in range(1, args.messages + 1):
+            rk = random.choices(keys, weights)[0]
+            broker.publish(settings.RABBIT_EXCHANGE, InMemoryMessage(rk, make_body(rk, task_id)))
+            if args.rate:
+                await asyncio.sleep(1 / args.rate)
+
+        while any(m.outcome is None for m in broker.published):
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - t0
+
+        worker.stop()
+        await run_task
+        stop_lag.set()
+        await lag_task
+
+    by_key: Dict[str, Dict[str, List[float]]] = {}
+    by_priority: Dict[int, List[float]] = {}
+    waits, latencies = [], []
+    for m in broker.published:
+        if m.body not in started:
+            continue
+        wait = started[m.body] - m.published_at
+        latency = finished[m.body] - started[m.body]
+        waits.append(wait)
+        latencies.append(latency)
+        stats = by_key.setdefault(m.routing_key, {"wait": [], "latency": []})
+        stats["wait"].append(wait)
+        stats["latency"].append(latency)
+        by_priority.setdefault(priority_of(m.routing_key, m.body, m.priority), []).append(wait)
+
+    return {
+        "pool_size": pool_size,
+        "max_in_flight": worker.max_in_flight,
+        "messages": len(broker.published),
+        "failed": sum(1 for m in broker.published if m.outcome != "ack"),
+        "elapsed": elapsed,
+        "throughput": len(broker.published) / elapsed if elapsed else float("nan"),
+        "wait": waits,
+        "latency": latencies,
+        "lag": lag,
+        "by_key": by_key,
+        "by_priority": by_priority,
+    }
+
+
+def report(result: dict) -> None:
+    ms = lambda v: f"{v * 1000:8.1f}"
+    print(
+        f"\npool_size={result['pool_size']} max_in_flight={result['max_in_flight']} "
+        f"messages={result['messages']} failed={result['failed']} "
+        f"elapsed={result['elapsed']:.2f}s throughput={result['throughput']:.2f} msg/s"
+    )
+    print(f"  {'':30}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    rows = [("queue wait", result["wait"]), ("handler latency", result["latency"]),
+            ("event-loop lag", result["lag"])]
+    for rk, stats in sorted(result["by_key"].items()):
+        rows.append((f"  {rk} wait", stats["wait"]))
+        rows.append((f"  {rk} latency", stats["latency"]))
+    for priority, values in sorted(result["by_priority"].items(), reverse=True):
+        rows.append((f"  priority {priority} wait", values))
+    for label, values in rows:
+        print(f"  {label:30}{ms(pct(values, 50))} {ms(pct(values, 95))} {ms(pct(values, 99))} "
+              f"{ms(max(values) if values else float('nan'))}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--mix", default="insights=4,memo=2,slides=1,survey_data=3",
+                        help="routing key weights, e.g. insights=4,slides=1")
+    parser.add_argument("--rate", type=float, default=0.0, help="publish rate in msg/s (0 = burst)")
+    parser.add_argument("--max-in-flight", type=int, nargs="+", default=[1, 2, 4],
+                        help="pool size applied to every routing key, one run per value")
+    parser.add_argument("--seed", type=int, default=0)
+    for name, default in vars(Latency()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}" + ("" if name in ("cpu_ms", "jitter") else "-latency"),
+                            dest=name, type=float, default=default)
+    args = parser.parse_args()
+
+    for name in vars(LAT):
+        setattr(LAT, name, getattr(args, name))
+
+    with ExitStack() as stack:
+        install_fakes(stack)
+        for pool_size in args.max_in_flight:
+            random.seed(args.seed)
+            report(asyncio.run(run_once(pool_size, args)))
+
+
+if __name__ == "__main__":
+    main()
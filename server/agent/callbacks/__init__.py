@@ -1 +1 @@
-from .task import TaskManager
\ No newline at end of file
+from .task import TaskManager, mark_canceled, close_client, close_outbox, get_outbox
\ No newline at end of file
@@ -1 +1,3 @@
-from .manager import TaskManager
\ No newline at end of file
+from .manager import TaskManager, mark_canceled
+from .client import close_client
+from .outbox import close_outbox, get_outbox
\ No newline at end of file
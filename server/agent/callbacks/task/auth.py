@@ -1,14 +1,34 @@
+import asyncio
+import logging
 import time
-import requests
+
+import httpx
+
 from config import settings
+from .client import get_client
+
+logger = logging.getLogger(__name__)
+
 
 class ConsultantAuth:
-    def __init__(self):
+    """
+    Bearer token for the Consultant API, shared by every task in the process.
+
+    Only one password-grant request is in flight at a time: concurrent callers
+    wait on the same refresh. Once the token is within its refresh margin it's
+    renewed in the background while callers keep using the still-valid one.
+    """
+
+    def __init__(self, refresh_margin: float = None):
+        self.refresh_margin = settings.CONSULTANT_TOKEN_REFRESH_SECONDS if refresh_margin is None else refresh_margin
         self._access_token: str | None = None
         self._expiration: float = 0.0
+        self._refresh_at: float = 0.0
+        self._lock: asyncio.Lock | None = None
+        self._lock_loop: asyncio.AbstractEventLoop | None = None
+        self._background: asyncio.Task | None = None
 
-    def _fetch_new_token(self):
-        url = f"{settings.CONSULTANT_URL}/Auth/token"
+    async def _fetch_new_token(self):
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
         data = {
             "username": settings.CONSULTANT_USERNAME,
@@ -16,18 +36,66 @@ class ConsultantAuth:
             "grant_type": "password"
         }
 
-        response = requests.post(url, headers=headers, data=data)
+        response = await get_client().request('POST', '/Auth/token', headers=headers, data=data)
         response.raise_for_status()
 
         payload = response.json()
-        self._access_token = payload["access_token"]
         expires_in = payload["expires_in"]
-        self._expiration = time.monotonic() + expires_in - 60
+        now = time.monotonic()
+        self._access_token = payload["access_token"]
+        self._expiration = now + expires_in - 60
+        self._refresh_at = now + max(0.0, expires_in - self.refresh_margin)
 
     def _is_expired(self) -> bool:
         return time.monotonic() >= self._expiration
 
-    def get_token(self) -> str:
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        return self._lock
+
+    async def _refresh(self, stale: str | None):
+        async with self._get_lock():
+            # someone else refreshed while we waited
+            if self._access_token != stale and not self._is_expired():
+                return
+            await self._fetch_new_token()
+
+    async def _refresh_in_background(self, stale: str):
+        try:
+            await self._refresh(stale)
+        except Exception as e:
+            logger.warning("Background token refresh failed: %r", e)
+
+    async def get_token(self) -> str:
         if not self._access_token or self._is_expired():
-            self._fetch_new_token()
+            await self._refresh(self._access_token)
+        elif time.monotonic() >= self._refresh_at and (self._background is None or self._background.done()):
+            self._background = asyncio.create_task(self._refresh_in_background(self._access_token))
         return self._access_token
+
+    def invalidate(self, token: str):
+        """Drop `token` after the API rejected it, unless it's already been replaced."""
+        if token == self._access_token:
+            self._expiration = 0.0
+
+
+_auth = ConsultantAuth()
+
+
+def get_auth() -> ConsultantAuth:
+    return _auth
+
+
+async def authorized_request(method: str, path: str, **kwargs) -> httpx.Response:
+    """Call the Consultant API with the shared token, refreshing it once on a 401."""
+    headers = kwargs.pop('headers', None) or {}
+    token = await _auth.get_token()
+    response = await get_client().request(method, path, headers={**headers, 'Authorization': f'Bearer {token}'}, **kwargs)
+    if response.status_code == 401:
+        # token revoked or expired early
+        _auth.invalidate(token)
+        token = await _auth.get_token()
+        response = await get_client().request(method, path, headers={**headers, 'Authorization': f'Bearer {token}'}, **kwargs)
+    return response
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+
+import httpx
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_RETRY_STATUS = {502, 503, 504}
+# Safe to resend even if the first attempt reached the API
+_IDEMPOTENT = {"GET", "PUT", "PATCH", "DELETE"}
+
+
+class ConsultantClient:
+    """
+    Keep-alive HTTP client for the Consultant API, shared by every task in the
+    process so callbacks reuse pooled connections instead of a new TLS
+    handshake per call.
+
+    Transport errors and 502/503/504 responses are retried with backoff. POSTs
+    are only retried when the request never left the client (connect/pool
+    errors) so an insight or artifact isn't created twice.
+    """
+
+    def __init__(
+            self,
+            base_url: str = None,
+            timeout: float = None,
+            retries: int = None,
+            max_connections: int = None,
+    ):
+        self.base_url = base_url or settings.CONSULTANT_URL
+        self.retries = settings.CONSULTANT_RETRIES if retries is None else retries
+        max_connections = max_connections or settings.CONSULTANT_MAX_CONNECTIONS
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout or settings.CONSULTANT_TIMEOUT_SECONDS, connect=10.0),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        method = method.upper()
+        url = self.base_url + path
+        attempt = 0
+        while True:
+            try:
+                response = await self._client.request(method, url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                error = e
+            except httpx.TransportError as e:
+                if method not in _IDEMPOTENT:
+                    raise
+                error = e
+            else:
+                if response.status_code not in _RETRY_STATUS or method not in _IDEMPOTENT:
+                    return response
+                error = None
+
+            attempt += 1
+            if attempt > self.retries:
+                if error is not None:
+                    raise error
+                return response
+            delay = min(0.5 * 2 ** (attempt - 1), 8.0)
+            logger.warning(
+                "%s %s failed (%s); retry %d/%d in %.1fs",
+                method, path, error or response.status_code, attempt, self.retries, delay,
+            )
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_clients: dict[asyncio.AbstractEventLoop, ConsultantClient] = {}
+
+
+def get_client() -> ConsultantClient:
+    """The process-wide client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        # connections belong to the loop that opened them; drop clients of closed loops
+        for stale in [lp for lp in _clients if lp.is_closed()]:
+            del _clients[stale]
+        client = _clients[loop] = ConsultantClient()
+    return client
+
+
+async def close_client() -> None:
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -1,33 +1,57 @@
-from contextlib import contextmanager
-import requests
+import asyncio
+from contextlib import asynccontextmanager
 from logging import getLogger
 
-from config import settings
+from runtime.cancellation import REQUESTED, SHUTDOWN, TIMEOUT, cancel_reason
+from runtime.timing import start_timeline
 from .manager_state import _State
 
 
-@contextmanager
-def TaskManager(task_id):
+@asynccontextmanager
+async def TaskManager(task_id):
     logger = getLogger(__name__)
     state = _State(task_id)
+    state.timeline = start_timeline()
+    # Lifecycle calls go through the outbox: queued in order here, delivered
+    # in the background, so neither end of the task waits on the API.
     try:
-        headers = state.get_headers()
-        data = {'status': 'Running', "startedAt": state.get_current_timestamp()}
-        requests.patch(settings.CONSULTANT_URL + f'/Tasks/{task_id}', headers=headers, json=data)
+        state.mark_running()
         yield state
 
+    except asyncio.CancelledError:
+        reason = cancel_reason()
+        state.flush_progress()
+        if reason == REQUESTED:
+            logger.info(f"Task {task_id} canceled")
+            mark_canceled(task_id, state)
+        elif reason == TIMEOUT:
+            logger.warning(f"Task {task_id} timed out")
+            data = {'status': 'Failed', "errorMessage": "Timed out"}
+            state.send('PATCH', f'/Tasks/{task_id}', json=data)
+        elif reason == SHUTDOWN:
+            # the message is requeued, so another worker will pick it up again
+            logger.info(f"Task {task_id} interrupted by shutdown")
+            state.send('PATCH', f'/Tasks/{task_id}', json={'status': 'Queued'})
+        raise
+
     except Exception as e:
         logger.exception(f"Task {task_id} failed")
-        headers = state.get_headers()
+        state.flush_progress()
         data = {'status': 'Failed', "errorMessage": str(e)}
-        requests.patch(settings.CONSULTANT_URL + f'/Tasks/{task_id}', headers=headers, json=data)
+        state.send('PATCH', f'/Tasks/{task_id}', json=data)
         raise
 
     else:
-        for artifact in state.artifacts:
-            headers = state.get_headers()
-            data = artifact.to_json()
-            requests.post(settings.CONSULTANT_URL + f"/Tasks/{task_id}/artifacts", headers=headers, json=data)
-        headers = state.get_headers()
+        state.flush_progress()
         data = {'status': 'Succeeded', "completedAt": state.get_current_timestamp()}
-        requests.patch(settings.CONSULTANT_URL + f'/Tasks/{task_id}', headers=headers, json=data)
+        state.send('PATCH', f'/Tasks/{task_id}', json=data)
+
+    finally:
+        logger.info(f"Task {task_id} timings: {state.timings()}")
+
+
+def mark_canceled(task_id, state: _State | None = None):
+    """Report a task as canceled, whether or not it ever started."""
+    state = state or _State(task_id)
+    data = {'status': 'Canceled', "completedAt": state.get_current_timestamp()}
+    state.send('PATCH', f'/Tasks/{task_id}', json=data)
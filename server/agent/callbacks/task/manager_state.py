@@ -1,17 +1,31 @@
+import asyncio
+import json
 from datetime import datetime, timezone
+from logging import getLogger
+
+import httpx
 
 from config import settings
 from .artifact_schema import Artifact
-from .auth import ConsultantAuth
-import requests
+from .auth import authorized_request, get_auth
+from .outbox import get_outbox
+from runtime import run_blocking
+from runtime.timing import Timeline, span
+
+logger = getLogger(__name__)
 
 class _State:
     def __init__(self, task_id):
         self.artifacts: list[Artifact] = []
         self.data = {}
-        self._auth = ConsultantAuth()
+        self._auth = get_auth()
         self._progress = 0
         self._total_progress = None
+        self._progress_wanted: int | None = None
+        self._progress_sent: int | None = None
+        self._progress_changed: asyncio.Event | None = None
+        self._progress_reporter: asyncio.Task | None = None
+        self.timeline: Timeline | None = None
         self.task_id = task_id
 
     @staticmethod
@@ -23,20 +37,52 @@ class _State:
         return settings.CONSULTANT_URL
 
 
+    def send(self, method: str, path: str, json: dict | None = None):
+        """
+        Queue a status/progress/artifact call in the durable outbox. It's delivered
+        in order, with retry, without the task waiting on the API.
+        """
+        get_outbox().enqueue(self.task_id, method, path, json)
+
+
+    def mark_running(self):
+        data = {'status': 'Running', "startedAt": self.get_current_timestamp()}
+        self.send('PATCH', f'/Tasks/{self.task_id}', json=data)
+
+
     def add_artifact(self, a: Artifact):
         self.artifacts.append(a)
+        self.send('POST', f"/Tasks/{self.task_id}/artifacts", json=a.to_json())
 
 
-    def get_token(self): return (
-        self._auth.get_token())
+    async def add_large_artifact(self, a: Artifact):
+        """add_artifact for multi-MB payloads: encoded once, on the I/O pool, and sent as those bytes."""
+        self.artifacts.append(a)
+        content = await run_blocking(lambda: json.dumps(a.to_json()).encode())
+        await get_outbox().enqueue_content(self.task_id, 'POST', f"/Tasks/{self.task_id}/artifacts", content)
+
 
+    async def get_token(self): return (
+        await self._auth.get_token())
 
-    def get_headers(self):
+
+    async def get_headers(self):
         return {
-            'Authorization': f'Bearer {self.get_token()}'
+            'Authorization': f'Bearer {await self.get_token()}'
         }
 
 
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Call the Consultant API (auth included) directly, for calls that need the response."""
+        with span(f"callback:{method}"):
+            return await authorized_request(method, path, **kwargs)
+
+
+    def timings(self) -> dict:
+        """Where this task's time has gone so far; see runtime.timing."""
+        return self.timeline.summary() if self.timeline is not None else {}
+
+
     def reset_progress_total(self, total: int):
         self._total_progress = total
         self._progress = 0
@@ -53,10 +99,38 @@ class _State:
             percent = 1
         if percent >= 100:
             percent = 99
-
-        headers = self.get_headers()
-        data = {'progress': percent}
-
-        response = requests.patch(settings.CONSULTANT_URL + f'/Tasks/{self.task_id}', headers=headers, json=data)
-        if True:
-            pass
\ No newline at end of file
+        if percent == self._progress_wanted:
+            return
+
+        # Agents call this synchronously from the event loop; a background
+        # reporter queues the newest value at most once per interval.
+        self._progress_wanted = percent
+        if self._progress_reporter is None:
+            self._progress_changed = asyncio.Event()
+            self._progress_reporter = asyncio.ensure_future(self._report_progress())
+        self._progress_changed.set()
+
+
+    async def _report_progress(self):
+        # at most one PATCH per interval; values set in between are coalesced
+        while True:
+            await self._progress_changed.wait()
+            self._progress_changed.clear()
+            self._send_progress()
+            await asyncio.sleep(settings.CONSULTANT_PROGRESS_INTERVAL_SECONDS)
+
+
+    def _send_progress(self):
+        percent = self._progress_wanted
+        if percent is None or percent == self._progress_sent:
+            return
+        self.send('PATCH', f'/Tasks/{self.task_id}', json={'progress': percent})
+        self._progress_sent = percent
+
+
+    def flush_progress(self):
+        """Stop the progress reporter and queue the last value it hasn't sent yet."""
+        if self._progress_reporter is not None:
+            self._progress_reporter.cancel()
+            self._progress_reporter = None
+            self._send_progress()
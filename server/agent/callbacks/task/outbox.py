@@ -0,0 +1,301 @@
+import asyncio
+import fcntl
+import itertools
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+from typing import IO
+
+import httpx
+
+from config import settings
+from .auth import authorized_request
+from .client import _IDEMPOTENT
+from runtime import run_blocking
+
+logger = logging.getLogger(__name__)
+
+_RETRY_STATUS = {408, 429}
+# raised before the request left the client, so resending can't duplicate it
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+_MAX_BACKOFF = 60.0
+
+
+class Outbox:
+    """
+    Append-only journal of Consultant API callbacks (status, progress and
+    artifact calls), delivered by a background sender per task.
+
+    Each call is written to `outbox-N.jsonl` before it's sent and marked done
+    once the API accepts it, so a slow or unavailable API never blocks a task
+    and a restart replays whatever was still undelivered. Calls for one task
+    go out in the order they were queued; different tasks don't wait on each
+    other. Transport errors, 5xx, 408 and 429 are retried with backoff up to
+    CONSULTANT_OUTBOX_MAX_ATTEMPTS times; a call that runs out of attempts,
+    or gets any other 4xx, is moved to `dead-letter.jsonl` so it can't hold
+    back the rest of its task.
+
+    PUT/PATCH/DELETE are delivered at least once. POSTs (artifacts) follow
+    ConsultantClient's rule and are only resent when they provably never
+    reached the API (connection failures, or a 429): the API doesn't dedupe
+    them, so a POST that may have gone through is dead-lettered instead. For
+    the same reason a POST that was being sent when the process died isn't
+    replayed on restart.
+
+    Large bodies (inline survey artifacts) go through `enqueue_content`: the
+    caller serializes them off the loop, the bytes are written to `bodies/`
+    on the I/O pool, and they're sent as-is, so the loop never encodes them.
+
+    Every process holds an exclusive lock on its own journal. On startup it
+    also adopts journals no live process holds (e.g. from a crashed child).
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._queues: dict[object, deque[dict]] = {}
+        self._senders: dict[object, asyncio.Task] = {}
+        self._ids = itertools.count(1)
+        self._file: IO[str] | None = None
+        self._path: Path | None = None
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    # ── Public API ────────────────────────────────────────────────────────────
+    def start(self):
+        (self.directory / "bodies").mkdir(parents=True, exist_ok=True)
+        self._file, self._path = self._claim_journal()
+        own, maybe_sent = self._read_pending(self._file)
+        self._ids = itertools.count(max((e["id"] for e in own + maybe_sent), default=0) + 1)
+        for entry in maybe_sent:
+            self._dead_letter(entry, "was being sent when the process stopped")
+            self._write({"done": entry["id"]})
+        for entry in own:
+            self._queue(entry)
+        for path in sorted(self.directory.glob("outbox-*.jsonl")):
+            if path != self._path:
+                self._adopt(path)
+        if own:
+            logger.info("Replaying %d undelivered callback(s) from %s", len(own), self._path)
+
+    def enqueue(self, task_id, method: str, path: str, json_body: dict | None = None):
+        """Journal a callback; it's sent after everything enqueued before it for the same task."""
+        self._append({"id": next(self._ids), "task_id": task_id, "method": method, "path": path, "json": json_body})
+
+    async def enqueue_content(self, task_id, method: str, path: str, content: bytes):
+        """`enqueue` for a JSON body already encoded to bytes; the file write happens on the I/O pool."""
+        body_file = await run_blocking(_write_body, self.directory / "bodies", content)
+        # numbered after the write, so the task's later calls can't overtake it
+        self._append({"id": next(self._ids), "task_id": task_id, "method": method, "path": path, "body_file": body_file})
+
+    async def close(self, timeout: float):
+        """Give the senders up to `timeout` seconds to deliver the backlog; the rest stays journaled."""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            left = sum(len(q) for q in self._queues.values())
+            logger.warning("%d callback(s) left in %s for the next start", left, self._path)
+        for sender in self._senders.values():
+            sender.cancel()
+        if self._file is not None:
+            self._file.close()  # releases the lock
+
+    # ── Journal ───────────────────────────────────────────────────────────────
+    def _claim_journal(self) -> tuple[IO[str], Path]:
+        for n in itertools.count():
+            path = self.directory / f"outbox-{n}.jsonl"
+            f = self._try_lock(path)
+            if f is not None:
+                return f, path
+
+    @staticmethod
+    def _try_lock(path: Path) -> IO[str] | None:
+        f = open(path, "a+")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return None
+        # another process may have adopted and unlinked it while we waited
+        if not path.exists() or os.stat(path).st_ino != os.fstat(f.fileno()).st_ino:
+            f.close()
+            return None
+        return f
+
+    @staticmethod
+    def _read_pending(f: IO[str]) -> tuple[list[dict], list[dict]]:
+        """Undelivered entries: (safe to send, POSTs that may already have reached the API)."""
+        f.seek(0)
+        entries: dict[int, dict] = {}
+        sending: set[int] = set()
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line from a crash
+            if "done" in record:
+                entries.pop(record["done"], None)
+            elif "sending" in record:
+                sending.add(record["sending"])
+            else:
+                entries[record["id"]] = record
+        pending = sorted(entries.values(), key=lambda e: e["id"])
+        return (
+            [e for e in pending if e["id"] not in sending],
+            [e for e in pending if e["id"] in sending],
+        )
+
+    def _adopt(self, path: Path):
+        f = self._try_lock(path)
+        if f is None:
+            return  # a live process owns it
+        with f:
+            entries, maybe_sent = self._read_pending(f)
+            for entry in maybe_sent:
+                self._dead_letter(entry, "was being sent when the process stopped")
+            for entry in entries:
+                self._append({**entry, "id": next(self._ids)})
+            # only once they're in our journal
+            path.unlink()
+        if entries:
+            logger.info("Adopted %d undelivered callback(s) from %s", len(entries), path)
+
+    def _append(self, entry: dict):
+        self._write(entry)
+        self._queue(entry)
+
+    def _queue(self, entry: dict):
+        task_id = entry["task_id"]
+        self._queues.setdefault(task_id, deque()).append(entry)
+        self._idle.clear()
+        if task_id not in self._senders:
+            self._senders[task_id] = asyncio.create_task(self._send(task_id))
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def _dead_letter(self, entry: dict, reason: str):
+        logger.error(
+            "Giving up on %s %s for task %s: %s",
+            entry["method"], entry["path"], entry["task_id"], reason,
+        )
+        record = {**entry, "reason": reason, "failedAt": time.time()}
+        # shared by every process; the lock keeps lines whole
+        with open(self.directory / "dead-letter.jsonl", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.write(json.dumps(record) + "\n")
+
+    # ── Delivery ──────────────────────────────────────────────────────────────
+    async def _send(self, task_id):
+        queue = self._queues[task_id]
+        attempts = 0
+        try:
+            while queue:
+                entry = queue[0]
+                attempts += 1
+                try:
+                    finished, reason = await self._deliver(entry)
+                except Exception:
+                    logger.exception("Delivering %s %s for task %s failed", entry["method"], entry["path"], task_id)
+                    finished, reason = False, None
+                if not finished:
+                    if attempts < settings.CONSULTANT_OUTBOX_MAX_ATTEMPTS:
+                        await asyncio.sleep(min(0.5 * 2 ** (attempts - 1), _MAX_BACKOFF))
+                        continue
+                    reason = f"still failing after {attempts} attempts"
+                attempts = 0
+                queue.popleft()
+                self._finish(entry, reason)
+        finally:
+            # a later enqueue starts a fresh sender for whatever is left
+            del self._senders[task_id]
+            if not queue:
+                del self._queues[task_id]
+        if not self._queues:
+            # everything delivered: start the journal over
+            try:
+                self._file.seek(0)
+                self._file.truncate()
+            except OSError:
+                logger.exception("Couldn't truncate %s", self._path)
+            self._idle.set()
+
+    def _finish(self, entry: dict, reason: str | None):
+        """Bookkeeping for an entry that's out of the queue; a failure here only risks a replay."""
+        try:
+            if reason is not None:
+                self._dead_letter(entry, reason)
+            elif "body_file" in entry:
+                os.unlink(entry["body_file"])  # dead letters keep theirs
+            self._write({"done": entry["id"]})
+        except OSError:
+            logger.exception("Couldn't record %s %s for task %s as done", entry["method"], entry["path"], entry["task_id"])
+
+    async def _deliver(self, entry: dict) -> tuple[bool, str | None]:
+        """
+        (finished, why it failed). Not finished means try again later; a
+        finished entry with a reason goes to the dead-letter file.
+        """
+        method, path = entry["method"], entry["path"]
+        idempotent = method in _IDEMPOTENT
+        kwargs = {"json": entry.get("json")}
+        if "body_file" in entry:
+            try:
+                content = await run_blocking(Path(entry["body_file"]).read_bytes)
+            except OSError as e:
+                return True, f"couldn't read the queued body: {e!r}"
+            kwargs = {"content": content, "headers": {"Content-Type": "application/json"}}
+        if not idempotent:
+            self._write({"sending": entry["id"]})
+        try:
+            response = await authorized_request(method, path, **kwargs)
+        except _NOT_SENT as e:
+            logger.warning("%s %s for task %s failed: %r", method, path, entry["task_id"], e)
+            return False, None
+        except httpx.TransportError as e:
+            if not idempotent:
+                return True, f"{e!r} after the request may have reached the API"
+            logger.warning("%s %s for task %s failed: %r", method, path, entry["task_id"], e)
+            return False, None
+        except Exception as e:
+            # e.g. the token request failed; nothing was sent
+            logger.warning("%s %s for task %s failed: %r", method, path, entry["task_id"], e)
+            return False, None
+        status = response.status_code
+        if status < 400:
+            return True, None
+        # a 429 was turned away unprocessed; anything else may have been acted on
+        if status == 429 or (idempotent and (status >= 500 or status in _RETRY_STATUS)):
+            logger.warning("%s %s for task %s returned %d", method, path, entry["task_id"], status)
+            return False, None
+        return True, f"{status} {response.text[:200]}"
+
+
+def _write_body(directory: Path, content: bytes) -> str:
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".json")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    return path
+
+
+_outboxes: dict[asyncio.AbstractEventLoop, Outbox] = {}
+
+
+def get_outbox() -> Outbox:
+    """The process-wide outbox for the running event loop, started on first use."""
+    loop = asyncio.get_running_loop()
+    outbox = _outboxes.get(loop)
+    if outbox is None:
+        outbox = _outboxes[loop] = Outbox(settings.WORKER_STATE_DIR / "outbox")
+        outbox.start()
+    return outbox
+
+
+async def close_outbox(timeout: float | None = None):
+    outbox = _outboxes.pop(asyncio.get_running_loop(), None)
+    if outbox is not None:
+        await outbox.close(settings.WORKER_OUTBOX_DRAIN_SECONDS if timeout is None else timeout)
@@ -11,6 +11,14 @@ class Settings(BaseSettings):
     AWS_REGION: str = 'us-east-2'
     AWS_S3_BUCKET: str = 'misc-webapp'
     AWS_FILE_PREFIX: str = 'virtual-consultant-two-dev'
+    # Also embed the full survey in the SurveyData artifact (not just the S3 summary).
+    # Needed until the web app loads survey data from S3 instead of the artifact.
+    SURVEY_DATA_ARTIFACT_INLINE: bool = True
+    # Parsed surveys kept in memory by each worker process, by their measured footprint
+    # (a 10k-crosstab survey is ~28 MiB). The worker task has 1 GiB for everything.
+    SURVEY_CACHE_MAX_BYTES: int = 256 * 2**20
+    SURVEY_SNAPSHOT_DIR: Path = BASE_DIR / '.worker_state' / 'surveys'  # gzipped surveys kept across restarts
+    SURVEY_SNAPSHOT_MAX_BYTES: int = 2 * 2**30
 
     AWS_ACCESS_KEY_ID: str = ''
     AWS_SECRET_ACCESS_KEY: str = ''
@@ -35,6 +43,50 @@ class Settings(BaseSettings):
     CONSULTANT_URL: str = 'http://localhost:8080/api'
     CONSULTANT_USERNAME: str = ''
     CONSULTANT_PASSWORD: str = ''
+    CONSULTANT_TIMEOUT_SECONDS: float = 30
+    CONSULTANT_RETRIES: int = 3  # for connection errors and 502/503/504
+    CONSULTANT_MAX_CONNECTIONS: int = 20  # keep-alive pool shared by every task in the process
+    CONSULTANT_TOKEN_REFRESH_SECONDS: float = 300  # renew the shared token this long before it expires
+    CONSULTANT_PROGRESS_INTERVAL_SECONDS: float = 2  # minimum gap between progress PATCHes for a task
+    CONSULTANT_OUTBOX_MAX_ATTEMPTS: int = 10  # tries per queued callback (~4 min with backoff) before it's dead-lettered
+
+    # -- Worker --
+    # Concurrent handler slots per routing key; each key also gets its own queue
+    # and a prefetch budget of the same size so long jobs can't starve short ones.
+    WORKER_CONCURRENCY: dict[str, int] = {
+        'task.insights': 2,
+        'task.memo': 1,
+        'task.slides': 1,
+        'task.survey_data': 2,
+    }
+    WORKER_DEFAULT_CONCURRENCY: int = 1  # keys missing from WORKER_CONCURRENCY
+    WORKER_IO_THREADS: int = 16  # thread pool for blocking requests/boto3/googleapiclient calls
+    WORKER_PROCESSES: int = 0  # children started by worker.supervisor; 0 = one per CPU the container's cgroup/affinity allows
+    WORKER_STATE_DIR: Path = BASE_DIR / '.worker_state'  # local files that should outlive a restart
+    WORKER_DEDUP_MAX_ENTRIES: int = 10_000  # completed task ids remembered for deduplication
+    WORKER_METRICS_PORT: int = 9100  # Prometheus /metrics; 0 disables. Supervisor children use port + index
+    # Extra messages prefetched per pool so an urgent one can jump ahead locally; capped at
+    # the pool's size. 0 leaves priority ordering to the broker (x-max-priority) and keeps
+    # unstarted work on the queue where other replicas can take it.
+    WORKER_PRIORITY_LOOKAHEAD: int = 0
+    # Longest a handler may run before it's cancelled and the task marked Failed.
+    WORKER_TASK_TIMEOUTS: dict[str, float] = {
+        'task.insights': 1800,
+        'task.memo': 1800,
+        'task.slides': 3600,
+        'task.survey_data': 600,
+    }
+    WORKER_DEFAULT_TASK_TIMEOUT: float = 1800  # keys missing from WORKER_TASK_TIMEOUTS
+    # Whole SIGTERM-to-exit budget; keep under the ECS stopTimeout (30s by default). In-flight
+    # tasks get what's left after the unwind (5s) and outbox reserves.
+    WORKER_SHUTDOWN_SECONDS: float = 27
+    WORKER_OUTBOX_DRAIN_SECONDS: float = 3  # reserved at the end to deliver queued callbacks; the rest replay on restart
+    WORKER_LOOP_LAG_THRESHOLD_SECONDS: float = 0.25  # event-loop stalls longer than this are logged with the blocking stack
+    WORKER_LOOP_LAG_REPORT_SECONDS: float = 60  # at most one stall report per this long; the rest are only counted
+    # Profile every task on these routing keys (single tasks can ask with an x-profile header)
+    WORKER_PROFILE_ROUTING_KEYS: list[str] = []
+    WORKER_PROFILE_DIR: Path = BASE_DIR / '.worker_state' / 'profiles'
+    WORKER_PROFILE_S3: bool = False  # save profiles under {AWS_FILE_PREFIX}/profiles/ instead of WORKER_PROFILE_DIR
 
     model_config = SettingsConfigDict(
         env_file=(
@@ -0,0 +1,33 @@
+"""
+Why a task's asyncio.Task was cancelled.
+
+The worker cancels handler tasks for more than one reason, and the code that
+unwinds them (TaskManager) reports a different status for each:
+
+    cancel_task(task, REQUESTED)
+    ...
+    except asyncio.CancelledError:
+        if cancel_reason() == REQUESTED: ...
+"""
+import asyncio
+from weakref import WeakKeyDictionary
+
+REQUESTED = "requested"  # a task.cancel message asked for it
+TIMEOUT = "timeout"  # ran past its routing key's execution timeout
+SHUTDOWN = "shutdown"  # still running at the drain deadline; the message goes back to the queue
+
+_reasons: "WeakKeyDictionary[asyncio.Task, str]" = WeakKeyDictionary()
+
+
+def cancel_task(task: asyncio.Task, reason: str) -> bool:
+    """Cancel `task`, remembering `reason` for whoever catches the CancelledError."""
+    if task.done():
+        return False
+    _reasons[task] = reason
+    return task.cancel(reason)
+
+
+def cancel_reason(task: asyncio.Task | None = None) -> str | None:
+    """The reason given to cancel_task for `task` (default: the current task)."""
+    task = task or asyncio.current_task()
+    return _reasons.get(task) if task is not None else None
@@ -0,0 +1,42 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from config import settings
+from .profiling import profiled_thread
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Process-wide thread pool for blocking I/O (requests, boto3, googleapiclient)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.WORKER_IO_THREADS,
+            thread_name_prefix="blocking-io",
+        )
+    return _executor
+
+
+def _bind(func: Callable[..., T], *args, **kwargs) -> Callable[[], T]:
+    # carry contextvars (task-scoped state) over to the pool thread
+    ctx = contextvars.copy_context()
+    return functools.partial(ctx.run, profiled_thread, func, *args, **kwargs)
+
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """Await a blocking call on the shared pool instead of stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), _bind(func, *args, **kwargs))
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait)
+        _executor = None
@@ -0,0 +1,126 @@
+"""
+Event-loop lag monitor.
+
+A heartbeat coroutine measures how late the loop wakes it up and exports that
+as a metric. A watchdog thread watches the heartbeat; when it's overdue by
+more than the threshold the loop is stuck in a blocking call, so the watchdog
+grabs the loop thread's stack right then. Once the loop recovers the stall is
+logged with that stack, e.g.
+
+    Event loop blocked for 1.84s in SheetsBackend.write_grid (sheets_backend.py:212)
+
+Reports are rate-limited; stalls in between are only counted.
+"""
+import asyncio
+import logging
+import os
+import sys
+import sysconfig
+import threading
+import time
+import traceback
+from types import FrameType
+from typing import List, Optional, Tuple
+
+from config import settings
+from .metrics import EVENT_LOOP_LAG, EVENT_LOOP_LAG_SECONDS, EVENT_LOOP_STALLS
+
+logger = logging.getLogger(__name__)
+
+# Frames from the stdlib or installed packages aren't the call site we want to name
+_LIBRARY_PATHS = tuple(
+    os.path.realpath(p) + os.sep
+    for p in {sysconfig.get_path("stdlib"), sysconfig.get_path("purelib"), sysconfig.get_path("platlib")}
+    if p
+)
+
+
+def _is_app_frame(filename: str) -> bool:
+    return not os.path.realpath(filename).startswith(_LIBRARY_PATHS)
+
+
+def _site(frame: FrameType) -> str:
+    """Innermost frame of our own code, as `Qualname (file.py:line)`."""
+    innermost = frame
+    while frame is not None:
+        if _is_app_frame(frame.f_code.co_filename):
+            break
+        frame = frame.f_back
+    frame = frame or innermost
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.1, threshold: float = None, report_every: float = None):
+        self.interval = interval
+        self.threshold = settings.WORKER_LOOP_LAG_THRESHOLD_SECONDS if threshold is None else threshold
+        self.report_every = settings.WORKER_LOOP_LAG_REPORT_SECONDS if report_every is None else report_every
+        self._beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        # (heartbeat it was taken for, blocking site, formatted stack)
+        self._captured: Optional[Tuple[float, str, List[str]]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._last_report = 0.0
+        self._suppressed = 0
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        watchdog.start()
+        try:
+            while True:
+                started = loop.time()
+                await asyncio.sleep(self.interval)
+                lag = max(0.0, loop.time() - started - self.interval)
+                EVENT_LOOP_LAG.set(lag)
+                EVENT_LOOP_LAG_SECONDS.observe(lag)
+                beat, self._beat = self._beat, time.monotonic()
+                if lag >= self.threshold:
+                    self._stalled(lag, beat)
+        finally:
+            self._stop.set()
+
+    # ── Watchdog thread ───────────────────────────────────────────────────────
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval / 2):
+            beat = self._beat
+            overdue = time.monotonic() - beat - self.interval
+            if overdue < self.threshold:
+                continue
+            with self._lock:
+                if self._captured is not None and self._captured[0] == beat:
+                    continue  # one capture per stall
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            captured = (beat, _site(frame), traceback.format_stack(frame))
+            del frame
+            with self._lock:
+                self._captured = captured
+
+    # ── Reporting ─────────────────────────────────────────────────────────────
+    def _stalled(self, lag: float, beat: float) -> None:
+        with self._lock:
+            captured, self._captured = self._captured, None
+        site, stack = "unknown", []
+        if captured is not None and captured[0] == beat:
+            _, site, stack = captured
+        EVENT_LOOP_STALLS.labels(site=site.split(" (", 1)[0]).inc()
+
+        now = time.monotonic()
+        if now - self._last_report < self.report_every:
+            self._suppressed += 1
+            return
+        suppressed, self._suppressed, self._last_report = self._suppressed, 0, now
+        logger.warning(
+            "Event loop blocked for %.2fs in %s%s\n%s",
+            lag, site,
+            f" ({suppressed} more stall(s) since the last report)" if suppressed else "",
+            "".join(stack).rstrip(),
+        )
@@ -0,0 +1,214 @@
+"""
+Tiny in-process metrics registry rendered in the Prometheus text format.
+
+Counters/gauges/histograms are thread-safe (Google calls are made from the I/O
+pool) and labelled the same way prometheus_client does it:
+
+    GOOGLE_API_CALLS.labels(service="sheets").inc()
+"""
+import asyncio
+import logging
+import math
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_REGISTRY: List["_Metric"] = []
+
+_DEFAULT_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def labels(self, **labels: str) -> "_Child":
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        return _Child(self, key)
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Child:
+    """A metric bound to one set of label values."""
+
+    def __init__(self, metric: _Metric, key: Tuple[str, ...]) -> None:
+        self._metric = metric
+        self._key = key
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._metric._inc(self._key, amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._metric._inc(self._key, -amount)
+
+    def set(self, value: float) -> None:
+        self._metric._set(self._key, value)
+
+    def observe(self, value: float) -> None:
+        self._metric._observe(self._key, value)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._inc((), amount)
+
+    def _inc(self, key, amount: float) -> None:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        self._set((), value)
+
+    def _set(self, key, value: float) -> None:
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = _DEFAULT_BUCKETS, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float) -> None:
+        self._observe((), value)
+
+    def _observe(self, key, value: float) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def _samples(self):
+        with self._lock:
+            items = [(k, list(c), self._sums[k]) for k, c in self._counts.items()]
+        for key, counts, total in items:
+            for bound, count in zip(self.buckets, counts):
+                le = f'le="{_fmt_value(bound)}"'
+                yield f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {count}"
+            yield f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {_fmt_value(total)}"
+            yield f"{self.name}_count{_fmt_labels(self.labelnames, key)} {counts[-1]}"
+
+
+def render() -> str:
+    return "\n".join(m.render() for m in _REGISTRY) + "\n"
+
+
+# ── Worker metrics ───────────────────────────────────────────────────────────
+TASKS_IN_FLIGHT = Gauge(
+    "worker_tasks_in_flight", "Handlers currently running", ["routing_key"])
+HANDLER_SECONDS = Histogram(
+    "worker_handler_seconds", "Wall time spent in a listener handler", ["routing_key"])
+MESSAGES = Counter(
+    "worker_messages_total", "Messages settled by the worker", ["routing_key", "outcome"])
+BEDROCK_REQUESTS = Counter(
+    "bedrock_requests_total", "Model requests made by each agent", ["agent"])
+BEDROCK_TOKENS = Counter(
+    "bedrock_tokens_total", "Tokens used by each agent", ["agent", "direction"])
+GOOGLE_API_CALLS = Counter(
+    "google_api_calls_total", "googleapiclient requests executed", ["service"])
+EVENT_LOOP_LAG = Gauge(
+    "worker_event_loop_lag_seconds", "Most recent event-loop scheduling delay")
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "worker_event_loop_delay_seconds", "Event-loop scheduling delay per heartbeat",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+EVENT_LOOP_STALLS = Counter(
+    "worker_event_loop_stalls_total", "Heartbeats delayed past the lag threshold, by blocking call site", ["site"])
+
+
+def usage_snapshot(usage) -> Tuple[int, int, int]:
+    return usage.requests, usage.input_tokens, usage.output_tokens
+
+
+def record_bedrock_usage(agent_name: str | None, before: Tuple[int, int, int], usage) -> None:
+    """Count the requests/tokens an agent run added to a shared RunUsage."""
+    agent_name = agent_name or "unknown"
+    requests, input_tokens, output_tokens = (
+        max(0, after - prev) for after, prev in zip(usage_snapshot(usage), before)
+    )
+    BEDROCK_REQUESTS.labels(agent=agent_name).inc(requests)
+    BEDROCK_TOKENS.labels(agent=agent_name, direction="input").inc(input_tokens)
+    BEDROCK_TOKENS.labels(agent=agent_name, direction="output").inc(output_tokens)
+
+
+# ── HTTP exposition ──────────────────────────────────────────────────────────
+async def _serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        # drain headers; we don't need them
+        while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        path = parts[1].split("?", 1)[0] if len(parts) > 1 else ""
+        if path in ("/metrics", "/"):
+            status, body = "200 OK", render().encode()
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            status, body, content_type = "404 Not Found", b"not found\n", "text/plain"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(port: int, host: str = "0.0.0.0") -> asyncio.AbstractServer:
+    server = await asyncio.start_server(_serve, host, port)
+    logger.info("Serving metrics on http://%s:%d/metrics", host, port)
+    return server
@@ -0,0 +1,189 @@
+"""
+Sampling profiler for a single asyncio task.
+
+    profiler = TaskProfiler(asyncio.current_task())
+    with profiler:
+        await handler(body)
+    files = profiler.results()
+
+A background thread samples the task every few milliseconds and counts
+collapsed stacks (the `flamegraph.pl` / speedscope input format), under one
+of three roots:
+
+    loop      the task was running on the event loop (CPU on the loop thread)
+    awaiting  the task was suspended; the stack is its await chain
+    thread    a run_blocking call the task made, running on the I/O pool
+
+`loop` + `awaiting` add up to the task's wall time; `thread` samples overlap
+the `awaiting` ones they were awaited from. tracemalloc runs alongside for the
+peak-memory summary. tracemalloc is process-wide, so allocations by tasks
+running concurrently with the profiled one are counted too.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextvars import ContextVar
+from types import FrameType
+from typing import Callable, Dict, List, Optional, Set, TypeVar
+
+T = TypeVar("T")
+
+_profiler: ContextVar[Optional["TaskProfiler"]] = ContextVar("task_profiler", default=None)
+
+_MEMORY_TOP = 25  # allocation sites listed in the memory summary
+_SNAPSHOT_GROWTH = 1.1  # re-snapshot once traced memory grows 10% past the last snapshot
+
+
+def profiled_thread(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run `func` on a pool thread, sampled by the caller's profiler if it has one."""
+    profiler = _profiler.get()
+    if profiler is None:
+        return func(*args, **kwargs)
+    ident = threading.get_ident()
+    profiler._threads.add(ident)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler._threads.discard(ident)
+
+
+def _label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame: Optional[FrameType]) -> List[str]:
+    """Root-first labels for `frame` and its callers."""
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _below(stack: List[str], prefix: str) -> List[str]:
+    """The part of `stack` under its first frame labelled `prefix…`."""
+    for i, label in enumerate(stack):
+        if label.startswith(prefix):
+            return stack[i + 1:]
+    return stack
+
+
+def _await_chain(coro) -> List[str]:
+    """Root-first labels for a suspended coroutine and everything it's awaiting."""
+    labels = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            # a Future, or a C-implemented awaitable: name it and stop
+            labels.append(f"<{type(coro).__name__}>")
+            break
+        labels.append(_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return labels
+
+
+class TaskProfiler:
+    def __init__(self, task: asyncio.Task, interval: float = 0.005):
+        self.task = task
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self.started = 0.0
+        self.duration = 0.0
+        self.peak_bytes = 0
+        self._loop = task.get_loop()
+        self._loop_thread = threading.get_ident()
+        self._threads: Set[int] = set()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._token = None
+        self._owns_tracemalloc = False
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._snapshot_bytes = 0
+
+    def __enter__(self) -> "TaskProfiler":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._token = _profiler.set(self)
+        self.started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample, name="task-profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.duration = time.perf_counter() - self.started
+        self._stop.set()
+        self._sampler.join()
+        _profiler.reset(self._token)
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak_bytes = max(self.peak_bytes, peak)
+        if self._snapshot is None:
+            self._snapshot, self._snapshot_bytes = tracemalloc.take_snapshot(), current
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+    # ── Sampler thread ────────────────────────────────────────────────────────
+    def _sample(self) -> None:
+        n = 0
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if asyncio.current_task(self._loop) is self.task:
+                stack = _thread_stack(frames.get(self._loop_thread))
+                # drop the event loop's own frames above the task's step
+                self._count("loop", _below(stack, "Handle._run "))
+            elif not self.task.done():
+                try:
+                    self._count("awaiting", _await_chain(self.task.get_coro()))
+                except (AttributeError, ValueError, RuntimeError):
+                    pass  # the coroutine moved on while we walked it
+            for ident in list(self._threads):
+                frame = frames.get(ident)
+                if frame is not None:
+                    self._count("thread", _below(_thread_stack(frame), "profiled_thread "))
+            del frames
+
+            n += 1
+            if n % 100 == 0:
+                self._check_memory()
+
+    def _count(self, root: str, stack: List[str]) -> None:
+        self.samples[";".join([root, *stack])] += 1
+
+    def _check_memory(self) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak_bytes = max(self.peak_bytes, peak)
+        if current > self._snapshot_bytes * _SNAPSHOT_GROWTH:
+            # closest we get to the allocations live at the peak
+            self._snapshot, self._snapshot_bytes = tracemalloc.take_snapshot(), current
+
+    # ── Results ───────────────────────────────────────────────────────────────
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def memory_summary(self) -> str:
+        lines = [
+            f"wall seconds: {self.duration:.3f}",
+            f"samples: {sum(self.samples.values())} every {self.interval * 1000:g}ms",
+            f"peak traced memory: {self.peak_bytes / 2**20:.1f} MiB",
+            f"traced at snapshot: {self._snapshot_bytes / 2**20:.1f} MiB",
+            "",
+            f"top {_MEMORY_TOP} allocation sites at the largest snapshot:",
+        ]
+        if self._snapshot is not None:
+            for stat in self._snapshot.statistics("lineno")[:_MEMORY_TOP]:
+                lines.append(f"  {stat.size / 2**20:8.2f} MiB  {stat.count:8d} blocks  {stat.traceback[0]}")
+        return "\n".join(lines) + "\n"
+
+    def results(self) -> Dict[str, bytes]:
+        """File name → contents for everything this profile produced."""
+        return {
+            "profile.collapsed": self.collapsed().encode(),
+            "memory.txt": self.memory_summary().encode(),
+        }
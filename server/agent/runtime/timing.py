@@ -0,0 +1,105 @@
+"""
+Per-task wall-clock timeline.
+
+TaskManager starts a Timeline for each task; code anywhere below it records
+spans without passing anything around:
+
+    with span("survey_download"):
+        ...
+    with span(f"llm:{agent.name}", kind=LLM):
+        result = await agent.run(...)
+
+The timeline lives in a contextvar, so spans from run_blocking threads land in
+the task that started them. Spans nest; each kind's total counts only time not
+already covered by a child span, so LLM time excludes the tool calls made
+inside the agent run.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+LLM = "llm"
+IO = "io"
+CPU = "cpu"
+
+
+@dataclass
+class _Span:
+    name: str
+    kind: str
+    start: float
+    duration: float = 0.0
+    children: float = 0.0
+
+    @property
+    def own(self) -> float:
+        return max(0.0, self.duration - self.children)
+
+
+@dataclass
+class Timeline:
+    started: float = field(default_factory=time.perf_counter)
+    spans: List[_Span] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def summary(self) -> dict:
+        """Totals per kind and per span name, in seconds, for the task so far."""
+        with self._lock:
+            spans = list(self.spans)
+        by_kind: Dict[str, float] = defaultdict(float)
+        by_name: Dict[str, Dict[str, float]] = {}
+        for s in spans:
+            by_kind[s.kind] += s.own
+            entry = by_name.setdefault(s.name, {"kind": s.kind, "count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += s.duration
+        total = time.perf_counter() - self.started
+        return {
+            "total_seconds": round(total, 3),
+            **{f"{kind}_seconds": round(by_kind.get(kind, 0.0), 3) for kind in (LLM, IO, CPU)},
+            "other_seconds": round(max(0.0, total - sum(by_kind.values())), 3),
+            "spans": {
+                name: {**entry, "seconds": round(entry["seconds"], 3)}
+                for name, entry in sorted(by_name.items(), key=lambda kv: -kv[1]["seconds"])
+            },
+        }
+
+
+_timeline: ContextVar[Optional[Timeline]] = ContextVar("timeline", default=None)
+_parent: ContextVar[Optional[_Span]] = ContextVar("timeline_parent", default=None)
+
+
+def start_timeline() -> Timeline:
+    timeline = Timeline()
+    _timeline.set(timeline)
+    _parent.set(None)
+    return timeline
+
+
+def current_timeline() -> Optional[Timeline]:
+    return _timeline.get()
+
+
+@contextmanager
+def span(name: str, kind: str = IO) -> Iterator[None]:
+    """Record how long the block takes; a no-op outside a task timeline."""
+    timeline = _timeline.get()
+    if timeline is None:
+        yield
+        return
+    parent = _parent.get()
+    current = _Span(name, kind, time.perf_counter())
+    token = _parent.set(current)
+    try:
+        yield
+    finally:
+        current.duration = time.perf_counter() - current.start
+        _parent.reset(token)
+        with timeline._lock:
+            timeline.spans.append(current)
+            if parent is not None:
+                parent.children += current.duration
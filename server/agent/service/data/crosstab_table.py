@@ -0,0 +1,50 @@
+import math
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .models.survey import CrosstabAnswer
+
+
+class CrosstabTable:
+    """
+    One crosstab as a dense float64 matrix. Rows are the vertical question's
+    answers and columns the horizontal (BY) question's, both in the order they
+    first appear in the payload. Intersections the payload doesn't have are NaN.
+
+    float64 keeps the payload's values exactly (float32 would change how some
+    of them round when formatted), and a crosstab is only a few dozen cells.
+    """
+
+    __slots__ = ("verticals", "horizontals", "values")
+
+    def __init__(self, verticals: List[str], horizontals: List[str], values: np.ndarray):
+        self.verticals = verticals
+        self.horizontals = horizontals
+        self.values = values
+
+    @classmethod
+    def from_answers(cls, answers: Iterable[CrosstabAnswer]) -> "CrosstabTable":
+        vertical_codes: Dict[str, int] = {}
+        horizontal_codes: Dict[str, int] = {}
+        rows: List[int] = []
+        cols: List[int] = []
+        percentages: List[float] = []
+        for a in answers:
+            rows.append(vertical_codes.setdefault(a.vertical_answer, len(vertical_codes)))
+            cols.append(horizontal_codes.setdefault(a.horizontal_answer, len(horizontal_codes)))
+            percentages.append(a.percentage)
+
+        values = np.full((len(vertical_codes), len(horizontal_codes)), np.nan)
+        values[np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)] = percentages
+        return cls(list(vertical_codes), list(horizontal_codes), values)
+
+    def select_columns(self, horizontals: Sequence[str]) -> "CrosstabTable":
+        """The columns for `horizontals` (a subset of self.horizontals), in that order."""
+        index = {h: i for i, h in enumerate(self.horizontals)}
+        cols = [index[h] for h in horizontals]
+        return CrosstabTable(self.verticals, list(horizontals), self.values[:, cols])
+
+    def rows(self) -> List[List[Optional[float]]]:
+        """The payload's values as Python floats; None where missing."""
+        return [[None if math.isnan(v) else v for v in row] for row in self.values.tolist()]
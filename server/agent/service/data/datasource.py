@@ -1,20 +1,27 @@
 import re
 from typing import Dict, List, Optional, Sequence, Tuple, Union, Iterable
 
-import io
-import json
 import gzip
+import json
 from logging import getLogger
-from collections import OrderedDict
+
+from botocore.exceptions import ClientError
 
 from config import settings
+from runtime.timing import CPU, span
+from .crosstab_table import CrosstabTable
 from .s3_client import s3_client, get_survey_data_key
+from .survey_cache import survey_cache
+from .survey_snapshots import survey_snapshots
+from .varname_index import VarnameIndex
 
 from service.slides.chartkit.models import AnswerOption, Question, Grid
 
 from .mock_datasource import SurveyDataSource
 from .models.survey import Survey, SurveyQuestion, CrosstabQuestion
 
+logger = getLogger(__name__)
+
 
 class SurveyDataLoadError(Exception):
     def __init__(self, kbid: str, key_number: int, message: str = None):
@@ -24,14 +31,90 @@ class SurveyDataLoadError(Exception):
             message = f"Failed to load survey data for kbid={kbid}, key_number={key_number}"
         super().__init__(message)
 
-def _download_survey_data(kbid, key_number):
+def _download_survey_data(kbid, key_number, etag: Optional[str] = None) -> Tuple[Optional[bytes], str]:
+    """
+    The gzipped survey JSON and its ETag. With `etag`, it's a conditional GET:
+    (None, etag) means S3 still holds that version.
+    """
     s3_key = get_survey_data_key(kbid, key_number)
+    conditional = {"IfNoneMatch": etag} if etag else {}
 
-    obj = s3_client.get_object(Bucket=settings.AWS_S3_BUCKET, Key=s3_key)
-    with gzip.GzipFile(fileobj=io.BytesIO(obj["Body"].read())) as gz:
-        survey_json = json.loads(gz.read().decode())
-
-    return Survey.model_validate(survey_json)
+    with span("survey_download"):
+        try:
+            obj = s3_client.get_object(Bucket=settings.AWS_S3_BUCKET, Key=s3_key, **conditional)
+        except ClientError as e:
+            if etag and e.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 304:
+                return None, etag
+            raise
+        return obj["Body"].read(), obj["ETag"]
+
+
+def _parse_survey_data(body: bytes) -> Survey:
+    """The subtotal-stripped survey, crosstabs as tables."""
+    with span("survey_parse", kind=CPU):
+        raw = gzip.decompress(body)
+        survey_json = json.loads(raw)
+        del raw
+        # Crosstabs are nearly all of a survey. Validating them one by one,
+        # turning each into its table and dropping its dict and answer models
+        # right away means only one crosstab's worth of objects is alive at once.
+        crosstabs = survey_json["survey_crosstab"]
+        survey_json["survey_crosstab"] = []
+        survey = Survey.model_validate(survey_json)
+        crosstabs.reverse()
+        while crosstabs:
+            survey.survey_crosstab.append(_tabulate(CrosstabQuestion.model_validate(crosstabs.pop())))
+        survey.remove_subtotals()
+        return survey
+
+
+def _tabulate(ct: CrosstabQuestion) -> CrosstabQuestion:
+    """Replace the crosstab's answer models with its CrosstabTable, subtotals left out."""
+    if ct._table is None:
+        ct.remove_subtotals()
+        ct._table = CrosstabTable.from_answers(ct.crosstab_answers)
+        ct.crosstab_answers = []
+    return ct
+
+
+def _read_snapshot(snapshot) -> Optional[bytes]:
+    try:
+        return snapshot.read()
+    except OSError as e:
+        logger.warning("Couldn't read survey snapshot %s: %r", snapshot.path, e)
+        return None
+
+
+def _load_survey(kbid, key_number) -> Survey:
+    """
+    The current survey, revalidated against S3 with one conditional GET.
+    Looked for in the process cache, then in the on-disk snapshots, and only
+    downloaded in full when neither has the version S3 reports.
+    """
+    with survey_cache.load_lock(kbid, key_number):
+        cached_etag = survey_cache.etag(kbid, key_number)
+        snapshot = survey_snapshots.latest(kbid, key_number)
+        body, etag = _download_survey_data(kbid, key_number, cached_etag or (snapshot and snapshot.etag))
+        if body is None:
+            survey = survey_cache.get(kbid, key_number, etag)
+            if survey is not None:
+                return survey
+            if snapshot is not None and snapshot.etag == etag:
+                body = _read_snapshot(snapshot)
+            if body is None:
+                # the memory copy was just evicted and the disk has another version
+                # (or lost this one to another process's eviction)
+                body, etag = _download_survey_data(kbid, key_number)
+        if snapshot is None or snapshot.etag != etag:
+            try:
+                survey_snapshots.write(kbid, key_number, etag, body)
+            except OSError as e:
+                # the snapshot only saves a download next time
+                logger.warning("Couldn't save a snapshot of survey kbid=%s key_number=%s: %r", kbid, key_number, e)
+
+        survey = _parse_survey_data(body)
+        survey_cache.put(kbid, key_number, etag, survey)
+        return survey
 
 
 def _canon(s: str) -> str:
@@ -79,8 +162,14 @@ class ReportingSurveyDataSource(SurveyDataSource):
         self._kbid = kbid
         self._key_number = key_number
         try:
-            self._survey: Survey = preloaded_survey or _download_survey_data(kbid, key_number)
-            self._survey.remove_subtotals()
+            if preloaded_survey is not None:
+                preloaded_survey.remove_subtotals()
+                for ct in preloaded_survey.survey_crosstab:
+                    _tabulate(ct)
+                self._survey: Survey = preloaded_survey
+            else:
+                # shared with other tasks through the cache; never modified here
+                self._survey = _load_survey(kbid, key_number)
         except Exception as e:
             raise SurveyDataLoadError(kbid, key_number) from e
 
@@ -91,6 +180,10 @@ class ReportingSurveyDataSource(SurveyDataSource):
             (_canon(ct.vertical_varname), _canon(ct.horizontal_varname)): ct
             for ct in self._survey.survey_crosstab
         }
+        self._varnames = VarnameIndex(
+            self._topline_by_var.keys(),
+            (k for pair in self._crosstab_by_pair.keys() for k in pair),
+        )
 
     # ---------- resolution helpers ----------
 
@@ -100,37 +193,12 @@ class ReportingSurveyDataSource(SurveyDataSource):
         used in indices. Tries topline first, then crosstab varnames,
         then question number (Q17/17), then fuzzy contains over both.
         Returns the canonical key (i.e., `_canon(actual_varname)`).
+        See VarnameIndex for the exact order.
         """
-        key = _canon(varname)
-
-        # 1) exact topline match
-        if key in self._topline_by_var:
-            return key
-
-        # 2) exact crosstab varname match
-        crosstab_keys = set()
-        for vs, hs in self._crosstab_by_pair.keys():
-            crosstab_keys.add(vs)
-            crosstab_keys.add(hs)
-        if key in crosstab_keys:
-            return key
-
-        is_question = re.compile(r'^[Qq]\d{1,2}')
-        # 4) fuzzy contains over topline, then over crosstab varnames
-        for k in self._topline_by_var.keys():
-            if key == k or key in k or k in key:
-                return k
-
-            if is_question.search(key) and is_question.search(k):
-                if is_question.search(key).group(0) == is_question.search(k).group(0):
-                    return k
-
-        for k in crosstab_keys:
-            if key == k or key in k or k in key:
-                return k
-
-
-        raise KeyError(f"Unknown varname: {varname}")
+        key = self._varnames.resolve(_canon(varname))
+        if key is None:
+            raise KeyError(f"Unknown varname: {varname}")
+        return key
 
     def _resolve_topline(self, varname: str) -> SurveyQuestion:
         k = self._resolve_var_key(varname)
@@ -200,32 +268,17 @@ class ReportingSurveyDataSource(SurveyDataSource):
         No normalization—each BY row may or may not sum to 100.
         """
         ct = self._resolve_crosstab(varname, by_varname)
+        table = ct._table
 
-        # Use matched varnames for display
-        display_var = ct.vertical_varname
-        display_by = ct.horizontal_varname
-
-        horizontals = OrderedDict()
-        verticals = OrderedDict()
-
-        # Build a lookup: (vertical_answer, horizontal_answer) -> percentage
-        lookup = {}
-        for ans in ct.crosstab_answers:
-            if ans.horizontal_answer not in horizontals:
-                horizontals[ans.horizontal_answer] = None
-            if ans.vertical_answer not in verticals:
-                verticals[ans.vertical_answer] = None
-            lookup[(ans.vertical_answer, ans.horizontal_answer)] = ans.percentage
-
-        headers = [""] + list(horizontals.keys())
-
-        rows: List[List[Union[str, float]]] = []
-        for v in verticals.keys():
-            row = [v]
-            for h in horizontals.keys():
-                row.append(lookup.get((v, h), None))  # None if missing intersection
-            rows.append(row)
+        # Optionally keep only the matching BY columns (fuzzy, preserving order)
+        if include_by_values:
+            table = table.select_columns(_filter_labels(table.horizontals, include_by_values))
 
+        headers = [""] + table.horizontals
+        rows: List[List[Union[str, float]]] = [
+            [v, *values]  # None if missing intersection
+            for v, values in zip(table.verticals, table.rows())
+        ]
         return Grid(headers=headers, rows=rows)
 
     # ---------- text helpers ----------
@@ -273,7 +326,7 @@ class ReportingSurveyDataSource(SurveyDataSource):
         lines = [f"{display_var} BY {display_by}", "\t".join(headers)]
         for row in grid.rows:
             by_value = str(row[0])
-            nums = [f"{float(x):.{decimals}f}" for x in row[1:]]
+            nums = ["" if x is None else f"{x:.{decimals}f}" for x in row[1:]]
             lines.append("\t".join([by_value] + nums))
         crosstab_data = "\n".join(lines)
         if varname != display_var or by_varname != display_by:
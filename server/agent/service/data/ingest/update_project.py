@@ -1,31 +1,42 @@
-import io
-import json
 import gzip
+import hashlib
 
 from config import settings
+from runtime import run_blocking
+from runtime.timing import CPU, span
 from service.data.s3_client import s3_client, get_survey_data_key
-from ..models.survey import Survey
+from ..models.survey import Survey, SurveyUpload
 
 from ..reporting_api.get_survey_data import get_survey_data
 
 
-async def update_project(kbid: str, key_number: int = 0) -> Survey | None:
-    survey_data = await get_survey_data(kbid, key_number)
-    if not survey_data:
-        return None
-    survey_dict = survey_data.model_dump()
+def _upload_survey_data(survey_data: Survey, kbid: str, key_number: int) -> SurveyUpload:
+    with span("survey_serialize", kind=CPU):
+        raw = survey_data.model_dump_json().encode()
+        compressed = gzip.compress(raw)
     s3_key = get_survey_data_key(kbid, key_number)
 
-    buf = io.BytesIO()
-    with gzip.GzipFile(fileobj=buf, mode="wb") as gz:
-        gz.write(json.dumps(survey_dict).encode())
-    buf.seek(0)
-
-    s3_client.upload_fileobj(
-        buf,
-        settings.AWS_S3_BUCKET,
-        s3_key,
-        ExtraArgs={"ContentType": "application/json", "ContentEncoding": "gzip"},
+    with span("survey_upload"):
+        s3_client.put_object(
+            Bucket=settings.AWS_S3_BUCKET,
+            Key=s3_key,
+            Body=compressed,
+            ContentType="application/json",
+            ContentEncoding="gzip",
+        )
+    return SurveyUpload(
+        s3_key=s3_key,
+        sha256=hashlib.sha256(raw).hexdigest(),
+        question_count=len(survey_data.survey_topline),
+        crosstab_count=len(survey_data.survey_crosstab),
+        bytes=len(raw),
+        compressed_bytes=len(compressed),
     )
 
-    return survey_data
\ No newline at end of file
+
+async def update_project(kbid: str, key_number: int = 0) -> tuple[Survey, SurveyUpload] | None:
+    survey_data = await get_survey_data(kbid, key_number)
+    if not survey_data:
+        return None
+    upload = await run_blocking(_upload_survey_data, survey_data, kbid, key_number)
+    return survey_data, upload
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Any
+
+from pydantic import BaseModel, PrivateAttr
 
 
 class SurveyAnswer(BaseModel):
@@ -29,6 +31,22 @@ class CrosstabQuestion(BaseModel):
     horizontal_varname: str
     horizontal_question: str
     crosstab_answers: list[CrosstabAnswer]
+    # The non-subtotal answers as a CrosstabTable. The datasource builds it when
+    # it loads a survey and empties crosstab_answers, so only the table is kept.
+    _table: Any = PrivateAttr(default=None)
+
+    def remove_subtotals(self):
+        self.crosstab_answers = [answer for answer in self.crosstab_answers if (not answer.is_subtotal_vertical and not answer.is_subtotal_horizontal)]
+
+
+class SurveyUpload(BaseModel):
+    """Where a survey was stored and enough about it to check the stored copy."""
+    s3_key: str
+    sha256: str  # of the uncompressed JSON
+    question_count: int
+    crosstab_count: int
+    bytes: int
+    compressed_bytes: int
 
 
 class Survey(BaseModel):
@@ -43,7 +61,7 @@ class Survey(BaseModel):
             question.survey_answers = [answer for answer in question.survey_answers if not answer.is_subtotal]
             return question
         def _remove_crosstab_subtotal_answers(question: CrosstabQuestion):
-            question.crosstab_answers = [answer for answer in question.crosstab_answers if (not answer.is_subtotal_vertical and not answer.is_subtotal_horizontal)]
+            question.remove_subtotals()
             return question
         self.survey_topline = [
             _remove_topline_subtotal_answers(question) for question in self.survey_topline
@@ -3,8 +3,25 @@ from pydantic import ValidationError
 import asyncio
 
 from config import settings
+from runtime import run_blocking
+from runtime.timing import CPU, span
 from ..models.survey import Survey
 
+
+def _poll_export(url: str, headers: dict) -> tuple[str | None, Survey | None]:
+    """One status poll, fetched and decoded off the loop: (status, the survey once it's done)."""
+    with span("reporting_api"):
+        response = requests.get(url, headers=headers)
+    response.raise_for_status()
+    # the finished export carries the whole survey, several MB of JSON
+    with span("survey_parse", kind=CPU):
+        response_json = response.json()
+        status = response_json.get('status')
+        if status != 'done':
+            return status, None
+        return status, Survey.model_validate(response_json.get("result"))
+
+
 async def get_survey_data(kbid: str, key_number: int = 0) -> Survey | None:
     task_queue_url = f"{settings.REPORTING_URL}/exports/json_exports/survey_data/{kbid}/{key_number}"
     task_result_url = f"{settings.REPORTING_URL}/exports/json_exports/survey_data/{kbid}/{key_number}/status"
@@ -17,24 +34,21 @@ async def get_survey_data(kbid: str, key_number: int = 0) -> Survey | None:
     sleep_time = 3
 
     try:
-        task_response = requests.get(task_queue_url, headers=headers)
+        with span("reporting_api"):
+            task_response = await run_blocking(requests.get, task_queue_url, headers=headers)
         task_response.raise_for_status()
         task_id = task_response.json().get('task_id')
         if not task_id:
             return None
         while total_waited < timeout:
-            await asyncio.sleep(sleep_time)
+            with span("survey_export_wait"):
+                await asyncio.sleep(sleep_time)
             total_waited += sleep_time
-            response = requests.get(f"{task_result_url}/{task_id}", headers=headers)
-            response.raise_for_status()
-            response_json = response.json()
-            if response_json.get('status') in ("pending", "in progress"):
+            status, survey = await run_blocking(_poll_export, f"{task_result_url}/{task_id}", headers)
+            if status in ("pending", "in progress"):
                 continue
-            if response_json.get('status') != 'done':
+            if status != 'done':
                 return None
-
-            survey_json = response_json.get("result")
-            survey = Survey.model_validate(survey_json)
             return survey
 
     except (requests.exceptions.RequestException, ValidationError) as e:
@@ -0,0 +1,116 @@
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+from config import settings
+from .models.survey import Survey
+
+logger = getLogger(__name__)
+
+_Key = Tuple[str, int]
+
+_CROSSTAB_SAMPLE = 500  # crosstabs measured per survey; the rest are assumed alike
+
+
+@dataclass
+class _Entry:
+    survey: Survey
+    etag: str
+    size: int
+
+
+class SurveyCache:
+    """
+    Process-wide LRU of parsed, subtotal-stripped surveys keyed by
+    (kbid, key_number), so back-to-back tasks on one project share a load.
+
+    Entries are tagged with the S3 ETag they were loaded from and only served
+    while S3 still reports that ETag. The size bound is on each survey's
+    footprint as measured by `footprint` when it's put in.
+
+    Cached surveys are shared between tasks: treat them as read-only.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[_Key, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._load_locks: Dict[_Key, threading.Lock] = {}
+
+    def get(self, kbid: str, key_number: int, etag: str) -> Optional[Survey]:
+        with self._lock:
+            entry = self._entries.get((kbid, key_number))
+            if entry is None or entry.etag != etag:
+                return None
+            self._entries.move_to_end((kbid, key_number))
+            return entry.survey
+
+    def etag(self, kbid: str, key_number: int) -> Optional[str]:
+        """ETag of the cached version, if any, without counting as a use."""
+        with self._lock:
+            entry = self._entries.get((kbid, key_number))
+            return entry.etag if entry is not None else None
+
+    def put(self, kbid: str, key_number: int, etag: str, survey: Survey) -> None:
+        size = footprint(survey)
+        if size > self.max_bytes:
+            logger.info("Survey kbid=%s key_number=%s (%d bytes) is too large to cache", kbid, key_number, size)
+            return
+        with self._lock:
+            old = self._entries.pop((kbid, key_number), None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[(kbid, key_number)] = _Entry(survey, etag, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def load_lock(self, kbid: str, key_number: int) -> threading.Lock:
+        """Held while loading a survey so concurrent tasks wait for one download."""
+        with self._lock:
+            return self._load_locks.setdefault((kbid, key_number), threading.Lock())
+
+
+def _deep_size(obj, seen: set) -> int:
+    """sys.getsizeof of obj and everything it references, skipping ids in `seen`."""
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, BaseModel):
+            stack.extend((o.__dict__, o.__pydantic_fields_set__, o.__pydantic_private__))
+        elif isinstance(o, dict):
+            stack.extend(o.values())  # keys are field names, shared by every model
+        elif isinstance(o, (list, tuple, set)):
+            stack.extend(o)
+        elif hasattr(type(o), "__slots__"):
+            stack.extend(getattr(o, name) for name in type(o).__slots__)
+    return total
+
+
+def footprint(survey: Survey) -> int:
+    """
+    Approximate bytes a parsed survey holds: models, strings, lists and
+    crosstab arrays. Crosstabs are nearly all of it, so a sample of them is
+    measured and scaled; this runs in well under a tenth of the parse time.
+    """
+    crosstabs = survey.survey_crosstab
+    size = _deep_size(survey, {id(ct) for ct in crosstabs})
+    if crosstabs:
+        sample = crosstabs[::max(1, len(crosstabs) // _CROSSTAB_SAMPLE)]
+        size += sum(_deep_size(ct, set()) for ct in sample) * len(crosstabs) // len(sample)
+    return size
+
+
+survey_cache = SurveyCache(settings.SURVEY_CACHE_MAX_BYTES)
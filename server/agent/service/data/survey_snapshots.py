@@ -0,0 +1,108 @@
+import os
+import re
+import tempfile
+import threading
+from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
+from typing import Optional
+
+from config import settings
+
+logger = getLogger(__name__)
+
+_SUFFIX = ".json.gz"
+
+
+@dataclass
+class Snapshot:
+    etag: str
+    path: Path
+
+    def read(self) -> bytes:
+        data = self.path.read_bytes()
+        # mtime is the eviction order: most recently used goes last
+        os.utime(self.path)
+        return data
+
+
+def _etag_name(etag: str) -> str:
+    """S3 ETags are quoted hex (plus `-N` for multipart uploads): keep just that."""
+    return re.sub(r"[^0-9A-Za-z-]", "", etag)
+
+
+class SurveySnapshotCache:
+    """
+    Gzipped survey JSON as last downloaded from S3, kept on local disk so a
+    restarted container revalidates with a conditional GET instead of paying
+    for a full download.
+
+    One file per (kbid, key_number), named after the ETag of the version it
+    holds, e.g. `kbid=123/key-number=0/3f2a…e1.json.gz`. Files are written to
+    a temp file and renamed into place, so readers (including other worker
+    processes) only ever see whole snapshots. Once the directory grows past
+    `max_bytes`, the least recently used snapshots are deleted.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._evict_lock = threading.Lock()
+
+    def _dir(self, kbid: str, key_number: int) -> Path:
+        return self.directory / f"kbid={kbid}" / f"key-number={key_number}"
+
+    def latest(self, kbid: str, key_number: int) -> Optional[Snapshot]:
+        newest = None
+        for path in self._dir(kbid, key_number).glob(f"*{_SUFFIX}"):
+            try:
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if newest is None or mtime > newest[0]:
+                newest = (mtime, path)
+        if newest is None:
+            return None
+        path = newest[1]
+        return Snapshot(f'"{path.name[:-len(_SUFFIX)]}"', path)
+
+    def write(self, kbid: str, key_number: int, etag: str, data: bytes) -> Optional[Snapshot]:
+        if len(data) > self.max_bytes:
+            return None
+        directory = self._dir(kbid, key_number)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{_etag_name(etag)}{_SUFFIX}"
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        # older versions of this survey are never read again
+        for old in directory.glob(f"*{_SUFFIX}"):
+            if old != path:
+                old.unlink(missing_ok=True)
+        self._evict()
+        return Snapshot(f'"{_etag_name(etag)}"', path)
+
+    def _evict(self) -> None:
+        with self._evict_lock:
+            files = []
+            for path in self.directory.glob(f"kbid=*/key-number=*/*{_SUFFIX}"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)  # another worker process may have got there first
+                total -= size
+                logger.info("Evicted survey snapshot %s", path)
+
+
+survey_snapshots = SurveySnapshotCache(settings.SURVEY_SNAPSHOT_DIR, settings.SURVEY_SNAPSHOT_MAX_BYTES)
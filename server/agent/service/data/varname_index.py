@@ -0,0 +1,99 @@
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+_QUESTION = re.compile(r'^[Qq]\d{1,2}')
+_GRAM = 3  # n-gram length of the substring index
+
+
+def _question_prefix(key: str) -> Optional[str]:
+    m = _QUESTION.search(key)
+    return m.group(0) if m else None
+
+
+class _Keys:
+    """Canonical varnames in priority order, indexed for substring matches either way."""
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys: List[str] = list(dict.fromkeys(keys))
+        self.position: Dict[str, int] = {k: i for i, k in enumerate(self.keys)}
+        self._grams: Dict[str, Set[int]] = defaultdict(set)
+        for i, k in enumerate(self.keys):
+            for j in range(len(k) - _GRAM + 1):
+                self._grams[k[j:j + _GRAM]].add(i)
+
+    def containing(self, key: str) -> Optional[int]:
+        """First position whose key contains `key`."""
+        if len(key) < _GRAM:
+            return next((i for i, k in enumerate(self.keys) if key in k), None)
+        candidates = None
+        for j in range(len(key) - _GRAM + 1):
+            postings = self._grams.get(key[j:j + _GRAM])
+            if not postings:
+                return None
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                return None
+        return min((i for i in candidates if key in self.keys[i]), default=None)
+
+    def contained_in(self, key: str) -> Optional[int]:
+        """First position whose key is a substring of `key`."""
+        found = (
+            self.position.get(key[a:b])
+            for a in range(len(key))
+            for b in range(a + 1, len(key) + 1)
+        )
+        return min((i for i in found if i is not None), default=None)
+
+    def fuzzy(self, key: str) -> Optional[int]:
+        hits = [i for i in (self.containing(key), self.contained_in(key)) if i is not None]
+        return min(hits, default=None)
+
+
+class VarnameIndex:
+    """
+    Resolves a canonical varname the way ReportingSurveyDataSource always
+    has, but from indexes built once instead of scans on every call:
+
+      1) exact topline varname
+      2) exact crosstab varname
+      3) first topline varname (in survey order) that contains it, is
+         contained in it, or shares its question-number prefix (Q1, Q12…)
+      4) first crosstab varname (in survey order) that contains it or is
+         contained in it
+
+    Answers are memoized; None means no match.
+    """
+
+    def __init__(self, topline_keys: Iterable[str], crosstab_keys: Iterable[str]):
+        self._topline = _Keys(topline_keys)
+        self._crosstab = _Keys(crosstab_keys)
+        self._by_question: Dict[str, int] = {}
+        for i, k in enumerate(self._topline.keys):
+            prefix = _question_prefix(k)
+            if prefix is not None:
+                self._by_question.setdefault(prefix, i)
+        self._memo: Dict[str, Optional[str]] = {}
+
+    def resolve(self, key: str) -> Optional[str]:
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        resolved = self._memo[key] = self._resolve(key)
+        return resolved
+
+    def _resolve(self, key: str) -> Optional[str]:
+        if key in self._topline.position or key in self._crosstab.position:
+            return key
+
+        hits = [self._topline.fuzzy(key)]
+        prefix = _question_prefix(key)
+        if prefix is not None:
+            hits.append(self._by_question.get(prefix))
+        hits = [i for i in hits if i is not None]
+        if hits:
+            return self._topline.keys[min(hits)]
+
+        i = self._crosstab.fuzzy(key)
+        return self._crosstab.keys[i] if i is not None else None
@@ -1,6 +1,8 @@
 from typing import List, Dict, Any
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from runtime.metrics import GOOGLE_API_CALLS
+from runtime.timing import span
 
 
 class MemoCreator:
@@ -33,7 +35,7 @@ class MemoCreator:
     # ── Public API ────────────────────────────────────────────────────────────
     def read_all_text(self) -> str:
         """Return all visible text in the document, including text inside tables and TOCs."""
-        doc = self.docs.documents().get(documentId=self.document_id).execute()
+        doc = self._execute(self.docs.documents().get(documentId=self.document_id))
         body = doc.get("body", {})
         content = body.get("content", [])
         return self._read_structural_elements(content)
@@ -44,7 +46,7 @@ class MemoCreator:
         The Google Docs model ends with a newline; we insert at (endIndex - 1).
         """
         # Fetch to get the current end index
-        doc = self.docs.documents().get(documentId=self.document_id).execute()
+        doc = self._execute(self.docs.documents().get(documentId=self.document_id))
         body = doc.get("body", {})
         content = body.get("content", [])
         if not content:
@@ -66,11 +68,16 @@ class MemoCreator:
             }
         ]
 
-        self.docs.documents().batchUpdate(
+        self._execute(self.docs.documents().batchUpdate(
             documentId=self.document_id, body={"requests": requests}
-        ).execute()
+        ))
 
     # ── Internals ─────────────────────────────────────────────────────────────
+    def _execute(self, request):
+        GOOGLE_API_CALLS.labels(service="docs").inc()
+        with span("google:docs"):
+            return request.execute()
+
     def _read_structural_elements(self, elements: List[Dict[str, Any]]) -> str:
         """Recursively extract text from paragraphs, tables, and table of contents."""
         text = []
@@ -4,10 +4,13 @@ from botocore.exceptions import ClientError
 
 from service.data.datasource import ReportingSurveyDataSource
 from service.docs.memo_creator import MemoCreator
+from runtime import run_blocking
 
 from .text_block_agent import text_block_agent, TextBlockDependencies, TextOutput
 from .memo_agent import memo_agent, MemoDependencies, MemoOutput
 from ..interfaces import ProgressCallback
+from runtime.metrics import record_bedrock_usage, usage_snapshot
+from runtime.timing import LLM, span
 
 MEMO_AGENT_DEFAULT_PROMPT = (
     "You're a political analyst finalizing a memo from the work of your assistant. "
@@ -86,7 +89,7 @@ class InsightsToMemoAgent:
         report_text = await self._merge_report_blocks(report_blocks_text, focus)
         if self.progress_callback:
             self.progress_callback.increment_progress()
-        self.memo_creator.append_text(report_text)
+        await run_blocking(self.memo_creator.append_text, report_text)
 
 
     async def _merge_report_blocks(self, report_blocks_text, focus):
@@ -105,14 +108,18 @@ class InsightsToMemoAgent:
         self.usage.requests = 0
         attempts = 0
         while True:
+            before = usage_snapshot(self.usage)
             try:
-                result = await agent.run(
-                    prompt,
-                    deps=deps,
-                    usage=self.usage
-                )
+                with span(f"llm:{agent.name}", kind=LLM):
+                    result = await agent.run(
+                        prompt,
+                        deps=deps,
+                        usage=self.usage
+                    )
                 return result.output
             except (UnexpectedModelBehavior, ClientError) as e:
                 attempts += 1
                 if attempts >= retries:
                     return None
+            finally:
+                record_bedrock_usage(agent.name, before, self.usage)
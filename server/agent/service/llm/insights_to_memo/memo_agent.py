@@ -21,6 +21,7 @@ class MemoOutput(BaseModel):
 
 memo_agent = Agent(
     model,
+    name="memo_agent",
     deps_type=MemoDependencies,
     output_type=MemoOutput,
 )
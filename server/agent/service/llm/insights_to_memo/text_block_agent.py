@@ -8,6 +8,7 @@ import re
 
 from ..base import model
 from service.data.datasource import ReportingSurveyDataSource
+from runtime.timing import CPU, span
 
 
 logger = getLogger(__name__)
@@ -25,6 +26,7 @@ class TextOutput(BaseModel):
 
 text_block_agent = Agent(
     model,
+    name="text_block_agent",
     deps_type=TextBlockDependencies,
     output_type=TextOutput,
 )
@@ -51,7 +53,8 @@ async def get_topline_data(ctx: RunContext[TextBlockDependencies], short_name: s
         """
     try:
         logger.info(f"LLM requested topline for {short_name}")
-        topline_data = ctx.deps.datasource.topline_text(short_name)
+        with span("tool:get_topline_data", kind=CPU):
+            topline_data = ctx.deps.datasource.topline_text(short_name)
         return topline_data
     except KeyError:
         logger.info(f"No topline for {short_name}")
@@ -74,7 +77,8 @@ async def get_crosstab_data(ctx: RunContext[TextBlockDependencies], short_name:
     """
     try:
         logger.info(f"LLM requested crosstab for {short_name} x {by_short_name}")
-        crosstab_data = ctx.deps.datasource.crosstab_text(short_name, by_short_name)
+        with span("tool:get_crosstab_data", kind=CPU):
+            crosstab_data = ctx.deps.datasource.crosstab_text(short_name, by_short_name)
         return crosstab_data
     except KeyError:
         logger.info(f"No crosstab for {short_name} x {by_short_name}")
@@ -47,6 +47,7 @@ chart_kind_string = '\n'.join([kind for kind in ChartKind])
 
 chart_agent = Agent(
     model,
+    name="chart_agent",
     deps_type=ChartDependencies,
     output_type=ChartSpecification,
     system_prompt=system_prompt,
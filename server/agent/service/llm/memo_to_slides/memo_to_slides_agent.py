@@ -6,11 +6,14 @@ from service.data.datasource import ReportingSurveyDataSource
 from service.slides.chartkit import ChartCreator, ChartRequest, CrosstabSpec, ToplineSpec
 from service.slides.slidekit import SlideCreator
 from service.docs.memo_creator import MemoCreator
+from runtime import run_blocking
 
 from .slide_outline_agent import slide_outline_agent, PowerpointOutline, SlideOutlineDependencies
 from .slide_agent import slide_agent, SlideDependencies
 from .chart_agent import chart_agent, ChartSpecification, ChartDependencies
 from ..interfaces import ProgressCallback
+from runtime.metrics import record_bedrock_usage, usage_snapshot
+from runtime.timing import LLM, span
 
 SLIDE_AGENT_DEFAULT_PROMPT = (
     "You work for a political consultant who has outlined a powerpoint for you to make. "
@@ -124,7 +127,7 @@ class MemoToSlidesAgent:
         if slide_spec.charts:
             for chart in slide_spec.charts:
                 await self._add_chart(chart)
-        self.slide_creator.create_slide()
+        await run_blocking(self.slide_creator.create_slide)
         return self.usage
 
 
@@ -148,7 +151,7 @@ class MemoToSlidesAgent:
             kind=chart_spec.kind,
             dataset=dataset_spec,
         )
-        chart_ref = self.chart_creator.render(chart_request)
+        chart_ref = await run_blocking(self.chart_creator.render, chart_request)
         if chart_ref:
             self.slide_creator.add_chart(spreadsheet_id=chart_ref.spreadsheet_id, chart_id=chart_ref.chart_id)
 
@@ -158,14 +161,18 @@ class MemoToSlidesAgent:
         self.usage.requests = 0
         attempts = 0
         while True:
+            before = usage_snapshot(self.usage)
             try:
-                result = await agent.run(
-                    prompt,
-                    deps=deps,
-                    usage=self.usage
-                )
+                with span(f"llm:{agent.name}", kind=LLM):
+                    result = await agent.run(
+                        prompt,
+                        deps=deps,
+                        usage=self.usage
+                    )
                 return result.output
             except (UnexpectedModelBehavior, ClientError) as e:
                 attempts += 1
                 if attempts >= retries:
                     return None
+            finally:
+                record_bedrock_usage(agent.name, before, self.usage)
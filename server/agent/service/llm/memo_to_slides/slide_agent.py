@@ -19,6 +19,7 @@ class SlideSpecification(BaseModel):
 
 slide_agent = Agent(
     model,
+    name="slide_agent",
     deps_type=SlideDependencies,
     output_type=SlideSpecification,
 )
@@ -19,6 +19,7 @@ class PowerpointOutline(BaseModel):
 
 slide_outline_agent = Agent(
     model,
+    name="slide_outline_agent",
     deps_type=SlideOutlineDependencies,
     output_type=PowerpointOutline,
 )
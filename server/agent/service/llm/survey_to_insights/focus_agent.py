@@ -16,6 +16,7 @@ class FocusOutput(BaseModel):
 
 focus_agent = Agent(
     model,
+    name="focus_agent",
     deps_type=FocusDependencies,
     output_type=FocusOutput
 )
@@ -8,6 +8,7 @@ import re
 from ..base import model
 
 from service.data.datasource import ReportingSurveyDataSource
+from runtime.timing import CPU, span
 
 logger = getLogger(__name__)
 
@@ -24,6 +25,7 @@ class InsightOutput(BaseModel):
 
 insight_agent = Agent(
     model,
+    name="insight_agent",
     deps_type=InsightDependencies,
     output_type=InsightOutput,
 )
@@ -55,7 +57,8 @@ async def get_topline_data(ctx: RunContext[InsightDependencies], short_name: str
         """
     try:
         logger.info(f"LLM requested topline for {short_name}")
-        topline_data = ctx.deps.datasource.topline_text(short_name)
+        with span("tool:get_topline_data", kind=CPU):
+            topline_data = ctx.deps.datasource.topline_text(short_name)
         return topline_data
     except KeyError:
         logger.info(f"No topline for {short_name}")
@@ -78,7 +81,8 @@ async def get_crosstab_data(ctx: RunContext[InsightDependencies], short_name: st
     """
     try:
         logger.info(f"LLM requested crosstab for {short_name} x {by_short_name}")
-        crosstab_data = ctx.deps.datasource.crosstab_text(short_name, by_short_name)
+        with span("tool:get_crosstab_data", kind=CPU):
+            crosstab_data = ctx.deps.datasource.crosstab_text(short_name, by_short_name)
         return crosstab_data
     except KeyError:
         logger.info(f"No crosstab for {short_name} x {by_short_name}")
@@ -8,6 +8,8 @@ from service.data.datasource import ReportingSurveyDataSource
 from .insight_agent import insight_agent, InsightDependencies, InsightOutput
 from .focus_agent import focus_agent, FocusDependencies, FocusOutput
 from ..interfaces import ProgressCallback
+from runtime.metrics import record_bedrock_usage, usage_snapshot
+from runtime.timing import LLM, span
 
 DEFAULT_FOCUS_AGENT_PROMPT = (
     "You're a consultant who needs help generating meaningful insights into the results of a survey. "
@@ -103,12 +105,14 @@ class SurveyToInsightsAgent:
         self.usage.requests = 0
         attempts = 0
         while True:
+            before = usage_snapshot(self.usage)
             try:
-                result = await agent.run(
-                    prompt,
-                    deps=deps,
-                    usage=self.usage
-                )
+                with span(f"llm:{agent.name}", kind=LLM):
+                    result = await agent.run(
+                        prompt,
+                        deps=deps,
+                        usage=self.usage
+                    )
                 return result.output
             except (UnexpectedModelBehavior, ClientError) as e:
                 attempts += 1
@@ -116,3 +120,5 @@ class SurveyToInsightsAgent:
                     return None
             except UsageLimitExceeded:
                 return None
+            finally:
+                record_bedrock_usage(agent.name, before, self.usage)
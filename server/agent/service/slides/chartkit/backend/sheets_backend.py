@@ -3,6 +3,8 @@ from __future__ import annotations
 from typing import Tuple, List, Optional, Dict, Any
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from runtime.metrics import GOOGLE_API_CALLS
+from runtime.timing import span
 
 from ..models import Grid
 
@@ -25,33 +27,38 @@ class SheetsBackend:
         )
         self.sheets = build("sheets", "v4", credentials=creds, cache_discovery=False)
 
+    def _execute(self, request):
+        GOOGLE_API_CALLS.labels(service="sheets").inc()
+        with span("google:sheets"):
+            return request.execute()
+
     def write_grid(self, sheet_name: str, grid: Grid) -> Tuple[int, int, int]:
         values = ([grid.headers] if grid.headers else []) + grid.rows
         n_rows = len(values)
         n_cols = max((len(r) for r in values), default=0)
 
         # Make new sheet
-        meta = self.sheets.spreadsheets().get(spreadsheetId=self.spreadsheet_id).execute()
+        meta = self._execute(self.sheets.spreadsheets().get(spreadsheetId=self.spreadsheet_id))
         n = len(meta.get("sheets", []))
         sheet_name = f"{n}-{sheet_name}"
         sheet_name = sheet_name[:80]
-        resp = self.sheets.spreadsheets().batchUpdate(
+        resp = self._execute(self.sheets.spreadsheets().batchUpdate(
             spreadsheetId=self.spreadsheet_id,
             body={"requests": [{"addSheet": {"properties": {"title": sheet_name}}}]},
-        ).execute()
+        ))
         sheet_id = resp["replies"][0]["addSheet"]["properties"]["sheetId"]
 
         # clear and write
-        self.sheets.spreadsheets().values().clear(
+        self._execute(self.sheets.spreadsheets().values().clear(
             spreadsheetId=self.spreadsheet_id, range=f"{sheet_name}!A:ZZ"
-        ).execute()
+        ))
         if values:
-            self.sheets.spreadsheets().values().update(
+            self._execute(self.sheets.spreadsheets().values().update(
                 spreadsheetId=self.spreadsheet_id,
                 range=f"{sheet_name}!A1",
                 valueInputOption="RAW",
                 body={"values": values},
-            ).execute()
+            ))
         return sheet_id, n_rows, n_cols
 
     def add_basic_chart(self, *, sheet_id: int, n_rows: int, spec: Dict[str, Any]) -> Optional[int]:
@@ -66,7 +73,7 @@ class SheetsBackend:
                 }
             }]
         }
-        resp = self.sheets.spreadsheets().batchUpdate(
+        resp = self._execute(self.sheets.spreadsheets().batchUpdate(
             spreadsheetId=self.spreadsheet_id, body=req
-        ).execute()
+        ))
         return resp["replies"][0]["addChart"]["chart"]["chartId"]
@@ -3,6 +3,8 @@ import uuid
 
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from runtime.metrics import GOOGLE_API_CALLS
+from runtime.timing import span
 
 from .geometry import Rect, to_pt
 from .layout import AutoLayoutEngine, LayoutSpec
@@ -79,19 +81,24 @@ class SlideCreator:
             requests.extend(item.to_requests(rect=rect, page_id=slide_id))
 
         # Execute batch
-        self.slide_service.presentations().batchUpdate(
+        self._execute(self.slide_service.presentations().batchUpdate(
             presentationId=self.presentation_id, body={"requests": requests}
-        ).execute()
+        ))
 
         self._items.clear()
         return slide_id
 
     # ── Internals ─────────────────────────────────────────────────────────────
+    def _execute(self, request):
+        GOOGLE_API_CALLS.labels(service="slides").inc()
+        with span("google:slides"):
+            return request.execute()
+
     def _get_presentation(self):
         if not self._presentation_cache:
-            self._presentation_cache = self.slide_service.presentations().get(
+            self._presentation_cache = self._execute(self.slide_service.presentations().get(
                 presentationId=self.presentation_id
-            ).execute()
+            ))
         return self._presentation_cache
 
     def _page_size_pt(self):
@@ -0,0 +1,173 @@
+import fcntl
+import json
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+_BYTES_PER_ID = 8  # a journal line: task id of up to 7 digits and a newline
+
+
+def task_id_of(body: bytes) -> int | None:
+    """Pull `task_id` out of a task message without validating the whole schema."""
+    try:
+        payload = json.loads(body)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    task_id = payload.get("task_id")
+    return task_id if isinstance(task_id, int) else None
+
+
+class TaskDeduplicator:
+    """
+    Skips task messages whose `task_id` is already running or has completed.
+
+    Every worker process started by worker.supervisor shares the state
+    directory, so the checks hold across processes, not just within one:
+
+    - A running task holds an exclusive flock on `running/<task_id>.lock`, so a
+      second delivery to any process is dropped instead of starting another
+      run. The kernel drops the lock if the process dies.
+    - Completed ids are appended to a journal file and kept in a bounded LRU.
+      Each claim first reads whatever other processes have appended since, and
+      redeliveries after a restart are still recognised.
+    - Appends and compaction take an flock on `<journal>.lock`. Compaction
+      writes a new file, with a new generation line at the top, and renames it
+      over the journal; readers that see a different generation read it from
+      the start rather than from a stale offset.
+    """
+
+    def __init__(self, path: Path, max_entries: int) -> None:
+        self._path = path
+        self._running_dir = path.parent / "running"
+        self._lock_path = path.parent / f"{path.name}.lock"
+        self._max_entries = max_entries
+        self._running: Dict[int, IO[bytes]] = {}
+        self._completed: OrderedDict[int, None] = OrderedDict()
+        self._generation: bytes | None = None
+        self._offset = 0
+        self._load()
+
+    def claim(self, task_id: int) -> bool:
+        """Mark `task_id` as running; False if it's a duplicate."""
+        if task_id in self._running:
+            return False
+        self._catch_up()
+        if task_id in self._completed:
+            return False
+        lock = self._lock_running(task_id)
+        if lock is None:
+            return False
+        self._running[task_id] = lock
+        return True
+
+    def release(self, task_id: int, *, completed: bool) -> None:
+        """
+        Drop the running claim. Only successful runs are remembered, so a task
+        that failed can still be retried by republishing it.
+        """
+        if completed:
+            self._remember(task_id)
+            self._append(task_id)
+        lock = self._running.pop(task_id, None)
+        if lock is not None:
+            # unlink while still holding the lock so no one can claim the old inode
+            (self._running_dir / f"{task_id}.lock").unlink(missing_ok=True)
+            lock.close()
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+    def _lock_running(self, task_id: int) -> IO[bytes] | None:
+        path = self._running_dir / f"{task_id}.lock"
+        f = open(path, "ab")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return None  # running in another process
+        # the holder may have released and unlinked it between our open and flock
+        if not path.exists() or os.stat(path).st_ino != os.fstat(f.fileno()).st_ino:
+            f.close()
+            return self._lock_running(task_id)
+        return f
+
+    def _catch_up(self) -> None:
+        """Pick up ids other processes completed since we last looked."""
+        try:
+            with open(self._path, "rb") as f:
+                generation = f.readline()
+                if generation != self._generation:
+                    # compacted since we last looked: the ids we had are in the new file too
+                    self._generation, self._offset = generation, 0
+                f.seek(self._offset)
+                data = f.read()
+        except OSError as e:
+            logger.warning("Couldn't read %s: %r", self._path, e)
+            return
+        complete = data.rfind(b"\n") + 1  # leave a half-written last line for next time
+        for line in data[:complete].split():
+            try:
+                self._remember(int(line))
+            except ValueError:
+                continue
+        self._offset += complete
+
+    def _remember(self, task_id: int) -> None:
+        self._completed[task_id] = None
+        self._completed.move_to_end(task_id)
+        while len(self._completed) > self._max_entries:
+            self._completed.popitem(last=False)
+
+    def _load(self) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._running_dir.mkdir(parents=True, exist_ok=True)
+        with self._journal_lock():
+            if not self._path.exists() or self._path.stat().st_size == 0:
+                self._rewrite([])
+            self._compact_if_large()
+        self._catch_up()
+        logger.info("Loaded %d completed task id(s) from %s", len(self._completed), self._path)
+
+    def _append(self, task_id: int) -> None:
+        try:
+            with self._journal_lock():
+                with open(self._path, "a") as f:
+                    f.write(f"{task_id}\n")
+                self._compact_if_large()
+        except OSError as e:
+            logger.warning("Couldn't record completed task %s: %r", task_id, e)
+
+    @contextmanager
+    def _journal_lock(self) -> Iterator[None]:
+        with open(self._lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _compact_if_large(self) -> None:
+        """Rewrite the journal as its newest max_entries ids once it's about twice that. Hold the journal lock."""
+        if self._path.stat().st_size <= 2 * self._max_entries * _BYTES_PER_ID:
+            return
+        # from the file itself, which has every process's appends
+        newest: OrderedDict[int, None] = OrderedDict()
+        for line in self._path.read_bytes().split():
+            try:
+                task_id = int(line)
+            except ValueError:
+                continue
+            newest[task_id] = None
+            newest.move_to_end(task_id)
+        while len(newest) > self._max_entries:
+            newest.popitem(last=False)
+        self._rewrite(newest)
+
+    def _rewrite(self, task_ids) -> None:
+        # inode numbers get reused, so a random generation is what marks the new file
+        tmp = self._path.parent / f"{self._path.name}.tmp"
+        tmp.write_text(f"generation {uuid.uuid4().hex}\n" + "".join(f"{task_id}\n" for task_id in task_ids))
+        os.replace(tmp, self._path)
@@ -1,15 +1,53 @@
+import ast
 from importlib import import_module
 from pkgutil import iter_modules
 from pathlib import Path
 
+from runtime import run_blocking
+
+
+class _LazyHandler:
+    """
+    Stand-in for a listener's `handle`. The listener module (and everything it
+    pulls in: pydantic_ai, boto3, googleapiclient, the agents) is imported on the
+    first message for its routing key rather than at worker startup.
+    """
+
+    def __init__(self, module: str) -> None:
+        self.module = module
+        self._fn = None
+
+    async def load(self):
+        if self._fn is None:
+            # importing the agent stack takes a while; keep the loop responsive
+            mod = await run_blocking(import_module, self.module)
+            self._fn = getattr(mod, "handle")
+        return self._fn
+
+    async def __call__(self, body):
+        fn = await self.load()
+        return await fn(body)
+
+
+def _routing_key(path: Path) -> str | None:
+    """Read a literal module-level `ROUTING_KEY = "..."` without importing the module."""
+    tree = ast.parse(path.read_text(), filename=str(path))
+    for node in tree.body:
+        if not isinstance(node, ast.Assign):
+            continue
+        if not any(isinstance(t, ast.Name) and t.id == "ROUTING_KEY" for t in node.targets):
+            continue
+        if isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+            return node.value.value
+    return None
+
+
 HANDLERS = {}
 
 _pkg_path = Path(__file__).parent
 for m in iter_modules([str(_pkg_path)]):
-    if m.name.startswith("_"):
+    if m.name.startswith("_") or m.ispkg:
         continue
-    mod = import_module(f"{__name__}.{m.name}")
-    rk = getattr(mod, "ROUTING_KEY", None)
-    fn = getattr(mod, "handle", None)
-    if rk and callable(fn):
-        HANDLERS[rk] = fn
+    rk = _routing_key(_pkg_path / f"{m.name}.py")
+    if rk:
+        HANDLERS[rk] = _LazyHandler(f"{__name__}.{m.name}")
@@ -1,11 +1,11 @@
 import logging
 from pydantic import ValidationError
-import requests
 
 from callbacks.task.artifact_schema import Artifact
 from ..schema.insights import Insights as InsightsSchema
 from service.llm.survey_to_insights import SurveyToInsightsAgent
 from callbacks import TaskManager
+from runtime import run_blocking
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +19,9 @@ async def handle(body):
         logger.error("task.insights body didn't validate: %r", body)
         return
 
-    with TaskManager(insights_schema.task_id) as task_manager:
-        agent = SurveyToInsightsAgent(
+    async with TaskManager(insights_schema.task_id) as task_manager:
+        agent = await run_blocking(
+            SurveyToInsightsAgent,
             kbid=insights_schema.kbid,
             key_number=insights_schema.key_number,
             progress_callback=task_manager,
@@ -38,16 +39,19 @@ async def handle(body):
 
         assert new_insights, "SurveyToInsightsAgent returned no insights"
         tokens_per_insight = (agent.usage.input_tokens + agent.usage.output_tokens * 3) // len(new_insights)
-        for insight in new_insights:
-            headers = task_manager.get_headers()
+        # One at a time: the API numbers each insight (OrderIndex) as it lands,
+        # so concurrent posts would list them out of generation order.
+        for i, insight in enumerate(new_insights):
             data = {"projectId": insights_schema.project_id, 'content': insight, 'source': 'Llm'}
-            response = requests.post(task_manager.get_base_url() + f'/Insights', headers=headers, json=data)
+            response = await task_manager.request('POST', '/Insights', json=data)
             insight_id = response.json().get('id')
             task_manager.add_artifact(Artifact(
                 resource_type='Insight',
                 action='Create',
                 created_resource_id=insight_id,
                 total_tokens=tokens_per_insight,
+                # the task's timing breakdown rides on its last artifact
+                payload={"timings": task_manager.timings()} if i == len(new_insights) - 1 else None,
             ))
         logger.info(f"Generated {len(new_insights)} insights for {insights_schema.kbid}")
         return
\ No newline at end of file
@@ -4,6 +4,7 @@ from pydantic import ValidationError
 
 from callbacks import TaskManager
 from callbacks.task.artifact_schema import Artifact
+from runtime import run_blocking
 from service.llm.insights_to_memo.insights_to_memo_agent import InsightsToMemoAgent
 from ..schema.memo import Memo as MemoSchema
 
@@ -19,8 +20,9 @@ async def handle(body):
         logger.error("task.memo body didn't validate: %r", body)
         return
 
-    with TaskManager(memo_schema.task_id) as task_manager:
-        insights_to_memo_agent = InsightsToMemoAgent(
+    async with TaskManager(memo_schema.task_id) as task_manager:
+        insights_to_memo_agent = await run_blocking(
+            InsightsToMemoAgent,
             memo_schema.kbid,
             memo_schema.key_number,
             memo_schema.doc_id,
@@ -35,7 +37,8 @@ async def handle(body):
         task_manager.add_artifact(Artifact(
             resource_type='Memo',
             action='Edit',
-            total_tokens=total_tokens
+            total_tokens=total_tokens,
+            payload={"timings": task_manager.timings()},
         ))
         logger.info(f"Generated memo for {memo_schema.kbid}")
     return
\ No newline at end of file
@@ -3,6 +3,7 @@ from pydantic import ValidationError
 
 from callbacks import TaskManager
 from callbacks.task.artifact_schema import Artifact
+from runtime import run_blocking
 from service.llm.memo_to_slides import MemoToSlidesAgent
 from ..schema.slides import Slides as SlidesSchema
 
@@ -18,8 +19,9 @@ async def handle(body):
         logger.error("task.slides body didn't validate: %r", body)
         return
 
-    with TaskManager(slides_schema.task_id) as task_manager:
-        memo_to_slides_agent = MemoToSlidesAgent(
+    async with TaskManager(slides_schema.task_id) as task_manager:
+        memo_to_slides_agent = await run_blocking(
+            MemoToSlidesAgent,
             slides_schema.kbid,
             slides_schema.key_number,
             slides_schema.doc_id,
@@ -36,7 +38,8 @@ async def handle(body):
         task_manager.add_artifact(Artifact(
             resource_type='Slidedeck',
             action='Edit',
-            total_tokens=total_tokens
+            total_tokens=total_tokens,
+            payload={"timings": task_manager.timings()},
         ))
         logger.info(f"Generated slidedeck for {slides_schema.kbid}")
     return
\ No newline at end of file
@@ -1,17 +1,28 @@
 import logging
 from pydantic import ValidationError
-import requests
 
 from callbacks.task.artifact_schema import Artifact
 from ..schema.survey_data import SurveyData as SurveyDataSchema
 from service.data.reporting_api.get_project_data import get_project_data
 from service.data.ingest.update_project import update_project
+from service.data.models.survey import Survey, SurveyUpload
+from config import settings
 from callbacks import TaskManager
+from runtime import run_blocking
 
 logger = logging.getLogger(__name__)
 
 ROUTING_KEY = "task.survey_data"
 
+
+def _artifact_payload(survey_data: Survey, upload: SurveyUpload) -> dict:
+    payload = upload.model_dump()
+    if settings.SURVEY_DATA_ARTIFACT_INLINE:
+        # the web app still reads the survey straight from this artifact
+        payload = {**survey_data.model_dump(), **payload}
+    return payload
+
+
 async def handle(body):
     try:
         survey_data_schema = SurveyDataSchema.model_validate_json(body)
@@ -20,27 +31,28 @@ async def handle(body):
         logger.error("task.survey_data body didn't validate: %r", body)
         return
 
-    with TaskManager(survey_data_schema.task_id) as task_manager:
-        project = get_project_data(survey_data_schema.kbid)
+    async with TaskManager(survey_data_schema.task_id) as task_manager:
+        project = await run_blocking(get_project_data, survey_data_schema.kbid)
         if not project:
             raise ValueError(f"Project with KBID {survey_data_schema.kbid} not found")
 
-        survey_data = await update_project(survey_data_schema.kbid, survey_data_schema.key_number)
+        result = await update_project(survey_data_schema.kbid, survey_data_schema.key_number)
 
-        if survey_data is None:
+        if result is None:
             logger.info(f"Failed to update project data for {survey_data_schema.kbid}")
             raise Exception("Failed to update project data")
+        survey_data, upload = result
 
         new_artifact = Artifact(
             resource_type='SurveyData',
             action='Create',
             total_tokens=0,
-            payload=survey_data.model_dump()
+            payload=await run_blocking(_artifact_payload, survey_data, upload)
         )
-        task_manager.add_artifact(new_artifact)
+        new_artifact.payload["timings"] = task_manager.timings()
+        await task_manager.add_large_artifact(new_artifact)
 
         logger.info(f"Updated project data for {survey_data_schema.kbid}")
-        headers = task_manager.get_headers()
         data = {"lastRefreshed": task_manager.get_current_timestamp()}
-        requests.patch(task_manager.get_base_url() + f'/Projects/{survey_data_schema.project_id}', headers=headers, json=data)
+        await task_manager.request('PATCH', f'/Projects/{survey_data_schema.project_id}', json=data)
         return
\ No newline at end of file
@@ -0,0 +1,46 @@
+import json
+
+MAX_PRIORITY = 9
+
+# Interactive requests (the user is waiting on the page) go ahead of bulk builds.
+_INTERACTIVE = 9
+_DEFAULT = 5
+_BULK = 1
+
+_BY_ROUTING_KEY = {
+    "task.survey_data": 7,
+    "task.insights": 3,
+    "task.memo": 3,
+    "task.slides": _BULK,
+}
+
+
+def _schema_priority(routing_key: str, body: bytes) -> int:
+    base = _BY_ROUTING_KEY.get(routing_key, _DEFAULT)
+    if routing_key != "task.insights":
+        return base
+    try:
+        payload = json.loads(body)
+    except (ValueError, TypeError):
+        return base
+    if not isinstance(payload, dict):
+        return base
+    # a single focused insight is the "generate one more" button in the UI
+    number = payload.get("number_of_insights")
+    if number is None and payload.get("focus") is None:
+        return _BULK  # full survey sweep
+    if not isinstance(number, int) or number <= 1:
+        return _INTERACTIVE  # the handler treats a missing count as 1
+    return base
+
+
+def priority_of(routing_key: str, body: bytes, message_priority: int | None = None) -> int:
+    """
+    Scheduling priority for a task message, 0 (lowest) to MAX_PRIORITY.
+
+    An explicit AMQP `priority` property wins; otherwise it's derived from the
+    routing key and, for insights, from how much work the request asks for.
+    """
+    if message_priority is not None:
+        return max(0, min(MAX_PRIORITY, int(message_priority)))
+    return _schema_priority(routing_key, body)
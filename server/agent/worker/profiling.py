@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict
+
+from aio_pika import IncomingMessage
+
+from config import settings
+from runtime import run_blocking
+from runtime.profiling import TaskProfiler
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+
+
+def wants_profile(message: IncomingMessage) -> bool:
+    """
+    Profile this task? Asked for per message by an `x-profile` header, or for
+    every task on a routing key listed in WORKER_PROFILE_ROUTING_KEYS. (Not by
+    the body: the task schemas forbid extra fields, so a `profile` key there
+    would fail validation and the task would never run.)
+    """
+    if message.routing_key in settings.WORKER_PROFILE_ROUTING_KEYS:
+        return True
+    return str((message.headers or {}).get(PROFILE_HEADER, "")).lower() in ("1", "true", "yes")
+
+
+def _save(routing_key: str, task_id: int | None, files: Dict[str, bytes]) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    name = f"task_id={task_id if task_id is not None else 'unknown'}/{routing_key}-{stamp}"
+    if settings.WORKER_PROFILE_S3:
+        from service.data.s3_client import s3_client
+
+        prefix = f"{settings.AWS_FILE_PREFIX}/profiles/{name}"
+        for filename, body in files.items():
+            s3_client.put_object(Bucket=settings.AWS_S3_BUCKET, Key=f"{prefix}/{filename}", Body=body)
+        return f"s3://{settings.AWS_S3_BUCKET}/{prefix}"
+    directory = settings.WORKER_PROFILE_DIR / name
+    directory.mkdir(parents=True, exist_ok=True)
+    for filename, body in files.items():
+        (directory / filename).write_bytes(body)
+    return str(directory)
+
+
+@asynccontextmanager
+async def profile_task(message: IncomingMessage, task_id: int | None) -> AsyncIterator[None]:
+    """Profile the block if the message asks for it, then save the results under the task id."""
+    if not wants_profile(message):
+        yield
+        return
+    profiler = TaskProfiler(asyncio.current_task())
+    try:
+        with profiler:
+            yield
+    finally:
+        try:
+            files = await run_blocking(profiler.results)
+            location = await run_blocking(_save, message.routing_key, task_id, files)
+            logger.info("Profile of task_id=%s (%.1fs) saved to %s", task_id, profiler.duration, location)
+        except Exception:
+            logger.exception("Couldn't save the profile of task_id=%s", task_id)
@@ -0,0 +1,5 @@
+from pydantic import BaseModel, ConfigDict
+
+class Cancel(BaseModel):
+    task_id: int
+    model_config = ConfigDict(extra="forbid")
\ No newline at end of file
@@ -0,0 +1,182 @@
+# worker/supervisor.py
+"""
+Run several Worker processes against the same durable queues.
+
+    python -m worker.supervisor
+
+Each child is a full asyncio Worker with its own connection and pools, so
+CPU-bound work (pydantic validation, gzip/json decode, prompt assembly) spreads
+across cores. The supervisor restarts children that die, forwards SIGTERM/SIGINT
+so every child drains its in-flight tasks, and logs the aggregate in-flight count.
+"""
+import asyncio
+import logging
+import math
+import multiprocessing as mp
+import os
+import signal
+import time
+from multiprocessing.sharedctypes import SynchronizedArray
+
+from config import settings, setup_logging
+
+logger = logging.getLogger(__name__)
+
+_POLL_INTERVAL = 1.0
+_MAX_RESTART_DELAY = 30.0
+_STABLE_AFTER = 60.0  # a child that lived this long resets its restart backoff
+
+
+def _cgroup_cpu_limit() -> float | None:
+    """CPUs allowed by the container's cgroup quota, if it sets one."""
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        quota, period = open("/sys/fs/cgroup/cpu.max").read().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read())
+        period = int(open("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read())
+        return quota / period if quota > 0 and period > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> int:
+    """
+    CPUs this container may actually use: the scheduler affinity, capped by
+    the cgroup quota. os.cpu_count() is the host's count on ECS/EC2.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not on Linux
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+def _child_main(index: int, in_flight: SynchronizedArray) -> None:
+    # Forked children inherit the supervisor's handlers; the Worker installs its own.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    setup_logging()
+
+    from worker.worker import Worker
+
+    async def _run() -> None:
+        port = settings.WORKER_METRICS_PORT
+        worker = Worker(metrics_port=port + index if port else 0)
+
+        async def _report() -> None:
+            while True:
+                in_flight[index] = worker.in_flight
+                await asyncio.sleep(_POLL_INTERVAL)
+
+        reporter = asyncio.create_task(_report())
+        try:
+            await worker.run()
+        finally:
+            reporter.cancel()
+            in_flight[index] = 0
+
+    asyncio.run(_run())
+
+
+class _Child:
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.process: mp.Process | None = None
+        self.started_at = 0.0
+        self.restart_delay = 1.0
+        self.restart_at = 0.0
+
+
+class Supervisor:
+    def __init__(self, processes: int | None = None) -> None:
+        self.processes = processes or settings.WORKER_PROCESSES or available_cpus()
+        self._ctx = mp.get_context("fork")
+        self._in_flight = self._ctx.Array("i", self.processes)
+        self._children = [_Child(i) for i in range(self.processes)]
+        self._stopping = False
+        self._last_reported: int | None = None
+
+    @property
+    def in_flight(self) -> int:
+        return sum(self._in_flight[:])
+
+    def _start(self, child: _Child) -> None:
+        self._in_flight[child.index] = 0
+        child.process = self._ctx.Process(
+            target=_child_main,
+            args=(child.index, self._in_flight),
+            name=f"worker-{child.index}",
+        )
+        child.process.start()
+        child.started_at = time.monotonic()
+        logger.info("Started worker-%d (pid=%d)", child.index, child.process.pid)
+
+    def _request_stop(self, signum, _frame) -> None:
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info("Shutdown signal received — draining %d worker(s)…", self.processes)
+        for child in self._children:
+            if child.process and child.process.is_alive():
+                os.kill(child.process.pid, signal.SIGTERM)
+
+    def _reap(self, child: _Child, now: float) -> None:
+        proc = child.process
+        if proc is None or proc.is_alive():
+            return
+        if child.restart_at == 0.0:
+            lived = now - child.started_at
+            if lived >= _STABLE_AFTER:
+                child.restart_delay = 1.0
+            logger.warning(
+                "worker-%d (pid=%d) exited with code %s after %.0fs; restarting in %.0fs",
+                child.index, proc.pid, proc.exitcode, lived, child.restart_delay,
+            )
+            self._in_flight[child.index] = 0
+            child.restart_at = now + child.restart_delay
+            child.restart_delay = min(child.restart_delay * 2, _MAX_RESTART_DELAY)
+        elif now >= child.restart_at:
+            child.restart_at = 0.0
+            self._start(child)
+
+    def _report(self) -> None:
+        total = self.in_flight
+        if total != self._last_reported:
+            logger.info("in-flight=%d across %d worker(s) %s", total, self.processes, list(self._in_flight[:]))
+            self._last_reported = total
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        for child in self._children:
+            self._start(child)
+
+        while not self._stopping:
+            now = time.monotonic()
+            for child in self._children:
+                self._reap(child, now)
+            self._report()
+            time.sleep(_POLL_INTERVAL)
+
+        # each child runs its own graceful drain; wait for all of them
+        for child in self._children:
+            if child.process is not None:
+                child.process.join()
+        logger.info("All workers stopped.")
+
+
+def main() -> None:
+    setup_logging()
+    Supervisor().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,106 @@
 # worker/async_worker.py
 import asyncio
+import heapq
+import itertools
 import logging
 import signal
+import time
+from collections import OrderedDict
 from contextlib import suppress
-from typing import Awaitable, Callable, Dict, Set
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Dict, List, Mapping, Set, Tuple
 
 import aio_pika
 from aio_pika import ExchangeType, IncomingMessage
+from pydantic import ValidationError
 
 from config import settings, setup_logging
-from worker.listeners import HANDLERS  # type: Dict[str, Callable[[bytes], Awaitable[None]]]
+from callbacks import close_client, close_outbox, get_outbox, mark_canceled
+from runtime import get_executor, shutdown_executor
+from runtime.cancellation import REQUESTED, SHUTDOWN, TIMEOUT, cancel_reason, cancel_task
+from runtime.loop_monitor import LoopMonitor
+from runtime.metrics import HANDLER_SECONDS, MESSAGES, TASKS_IN_FLIGHT, start_metrics_server
+from worker.idempotency import TaskDeduplicator, task_id_of
+from worker.priority import MAX_PRIORITY, priority_of
+from worker.profiling import profile_task
+from worker.schema.cancel import Cancel as CancelSchema
+from worker.listeners import HANDLERS
 
 logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 
+CANCEL_ROUTING_KEY = "task.cancel"
+_CANCELLED_MAX_ENTRIES = 1_000  # cancels seen before their task was delivered
+_UNWIND_SECONDS = 5.0  # time given to cancelled tasks to report status and nack
+
+_seq = itertools.count()
+
+
+@dataclass
+class _Pool:
+    """Consumer state for a single routing key: its own channel, queue and slots."""
+    routing_key: str
+    size: int
+    timeout: float
+    running: int = 0
+    # prefetched messages waiting for a slot, highest priority (then oldest) first
+    waiting: List[Tuple[int, int, IncomingMessage, int | None]] = field(default_factory=list)
+    channel: aio_pika.abc.AbstractChannel | None = None
+    queue: aio_pika.abc.AbstractQueue | None = None
+    consume_tag: str | None = None
+
+    def push(self, priority: int, message: IncomingMessage, task_id: int | None) -> None:
+        heapq.heappush(self.waiting, (-priority, next(_seq), message, task_id))
+
+    def pop(self) -> Tuple[IncomingMessage, int | None]:
+        _, _, message, task_id = heapq.heappop(self.waiting)
+        return message, task_id
+
 
 class Worker:
-    def __init__(self) -> None:
+    def __init__(
+            self,
+            concurrency: Mapping[str, int] | None = None,
+            metrics_port: int | None = None,
+            shutdown_seconds: float | None = None,
+    ) -> None:
         self.exchange_name = settings.RABBIT_EXCHANGE
         self.queue_name = f"{self.exchange_name}.worker"
-        self.max_in_flight = 4  # <= desired concurrency
-        self._sem = asyncio.Semaphore(self.max_in_flight)
+
+        # One pool per routing key so a burst of slow jobs (task.slides) can't
+        # hold every slot while quick ones (task.survey_data) sit in the queue.
+        concurrency = concurrency if concurrency is not None else settings.WORKER_CONCURRENCY
+        self._pools: Dict[str, _Pool] = {
+            rk: _Pool(
+                rk,
+                max(1, concurrency.get(rk, settings.WORKER_DEFAULT_CONCURRENCY)),
+                settings.WORKER_TASK_TIMEOUTS.get(rk, settings.WORKER_DEFAULT_TASK_TIMEOUT),
+            )
+            for rk in HANDLERS.keys()
+        }
+        self.max_in_flight = sum(p.size for p in self._pools.values())
+        self.lookahead = max(0, settings.WORKER_PRIORITY_LOOKAHEAD)
+        self.metrics_port = settings.WORKER_METRICS_PORT if metrics_port is None else metrics_port
+        self.shutdown_seconds = settings.WORKER_SHUTDOWN_SECONDS if shutdown_seconds is None else shutdown_seconds
+        self._deadline: float | None = None  # time.monotonic() by which shutdown must be done
         self._tasks: Set[asyncio.Task] = set()
+        self._running: Dict[int, asyncio.Task] = {}
+        self._cancelled: OrderedDict[int, None] = OrderedDict()
+        self._dedup = TaskDeduplicator(
+            settings.WORKER_STATE_DIR / "completed_tasks", settings.WORKER_DEDUP_MAX_ENTRIES
+        )
 
         self._conn: aio_pika.RobustConnection | None = None
         self._ch: aio_pika.abc.AbstractChannel | None = None
+        self._cancel_queue: aio_pika.abc.AbstractQueue | None = None
         self._exchange: aio_pika.abc.AbstractExchange | None = None
-        self._queue: aio_pika.abc.AbstractQueue | None = None
         self._stopping = asyncio.Event()
 
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
     async def connect(self) -> None:
         self._conn = await aio_pika.connect_robust(
             host=settings.RABBIT_HOST,
@@ -40,87 +112,281 @@ class Worker:
             timeout=60,
         )
         self._ch = await self._conn.channel()
-        await self._ch.set_qos(prefetch_count=self.max_in_flight)
-
         self._exchange = await self._ch.declare_exchange(
             self.exchange_name, ExchangeType.TOPIC, durable=True
         )
-        self._queue = await self._ch.declare_queue(self.queue_name, durable=True)
-        for rk in HANDLERS.keys():
-            await self._queue.bind(self._exchange, routing_key=rk)
+
+        # prefetch is per channel, so each pool gets its own channel and budget.
+        # x-max-priority has the broker hand out the most urgent message first.
+        # Any lookahead lets one that arrives after a delivery still jump ahead
+        # locally; it's capped at the pool size so one process can't hoard
+        # work other replicas could start.
+        for pool in self._pools.values():
+            pool.channel = await self._conn.channel()
+            await pool.channel.set_qos(prefetch_count=pool.size + min(self.lookahead, pool.size))
+            pool.queue = await pool.channel.declare_queue(
+                f"{self.queue_name}.{pool.routing_key}",
+                durable=True,
+                arguments={"x-max-priority": MAX_PRIORITY},
+            )
+            await pool.queue.bind(self.exchange_name, routing_key=pool.routing_key)
+
+        # Cancels go to every worker process, so each one gets a private queue
+        # instead of sharing a durable one.
+        self._cancel_queue = await self._ch.declare_queue(exclusive=True, auto_delete=True)
+        await self._cancel_queue.bind(self.exchange_name, routing_key=CANCEL_ROUTING_KEY)
+        await self._retire_shared_queue()
 
         logger.info(
-            "Connected. exchange=%s queue=%s keys=%s prefetch=%d heartbeat=%ds",
+            "Connected. exchange=%s queues=%s pools=%s heartbeat=%ds",
             self.exchange_name,
-            self._queue.name,
-            ",".join(HANDLERS.keys()),
-            self.max_in_flight,
+            ",".join(p.queue.name for p in self._pools.values()),
+            ",".join(f"{rk}:{p.size}" for rk, p in self._pools.items()),
             300,
         )
 
+    async def _retire_shared_queue(self) -> None:
+        """
+        Before per-key pools every key was bound to one durable queue named
+        `queue_name`. Left bound it collects a copy of every task, which old
+        workers still consuming it would run as well, so unbind it here and
+        delete it once it's empty and unused.
+        """
+        ch = await self._conn.channel()
+        try:
+            queue = await ch.declare_queue(self.queue_name, passive=True)
+        except aio_pika.exceptions.ChannelNotFoundEntity:
+            return  # already retired
+        try:
+            for rk in [*HANDLERS, CANCEL_ROUTING_KEY]:
+                await queue.unbind(self.exchange_name, routing_key=rk)
+            left = queue.declaration_result.message_count
+            if left:
+                logger.warning(
+                    "Unbound %s; it still holds %d task(s) for old workers to drain, "
+                    "and a later start deletes it once it's empty", self.queue_name, left,
+                )
+                return
+            await queue.delete(if_unused=True, if_empty=True)
+            logger.info("Deleted the retired queue %s", self.queue_name)
+        except aio_pika.exceptions.AMQPError as e:
+            # e.g. an old worker is still consuming it
+            logger.warning("Couldn't finish retiring %s: %r", self.queue_name, e)
+        finally:
+            with suppress(Exception):
+                if not ch.is_closed:
+                    await ch.close()
+
     async def close(self) -> None:
-        with suppress(Exception):
-            if self._ch and not self._ch.is_closed:
-                await self._ch.close()
+        channels = [p.channel for p in self._pools.values()] + [self._ch]
+        for ch in channels:
+            with suppress(Exception):
+                if ch and not ch.is_closed:
+                    await ch.close()
         with suppress(Exception):
             if self._conn and not self._conn.is_closed:
                 await self._conn.close()
         logger.info("Connection closed.")
 
-    def _install_signal_handlers(self) -> None:
-        loop = asyncio.get_running_loop()
+    def stop(self) -> None:
+        if not self._stopping.is_set():
+            logger.info("Shutdown signal received — stopping consumer…")
+            self._deadline = time.monotonic() + self.shutdown_seconds
+            self._stopping.set()
 
-        def _request_stop() -> None:
-            if not self._stopping.is_set():
-                logger.info("Shutdown signal received — stopping consumer…")
-                self._stopping.set()
+    def _remaining(self, reserve: float = 0.0) -> float:
+        """Seconds left of the shutdown budget, keeping `reserve` for later phases."""
+        return max(0.0, self._deadline - time.monotonic() - reserve)
 
+    def _install_signal_handlers(self) -> None:
+        loop = asyncio.get_running_loop()
         for sig in (signal.SIGINT, signal.SIGTERM):
             with suppress(NotImplementedError):
-                loop.add_signal_handler(sig, _request_stop)
+                loop.add_signal_handler(sig, self.stop)
+
+    async def _on_message(self, pool: _Pool, message: IncomingMessage) -> None:
+        # Redelivered or republished task: another run already owns (or finished) it.
+        # Claimed before waiting on the pool so queued duplicates collapse too.
+        task_id = task_id_of(message.body)
+        if task_id is not None and not self._dedup.claim(task_id):
+            logger.info("Skipping duplicate task_id=%s on %s", task_id, message.routing_key)
+            MESSAGES.labels(routing_key=message.routing_key, outcome="duplicate").inc()
+            with suppress(Exception):
+                await message.ack()
+            return
+        if task_id is not None and task_id in self._cancelled:
+            await self._skip_cancelled(message, task_id)
+            return
+
+        pool.push(priority_of(message.routing_key, message.body, message.priority), message, task_id)
+        self._dispatch(pool)
 
-    async def _on_message(self, message: IncomingMessage) -> None:
-        # Limit concurrent handler executions
-        await self._sem.acquire()
+    def _dispatch(self, pool: _Pool) -> None:
+        """Start the most urgent waiting messages while the pool has free slots."""
+        while pool.waiting and pool.running < pool.size and not self._stopping.is_set():
+            message, task_id = pool.pop()
+            pool.running += 1
+            task = asyncio.create_task(self._run_one(pool, message, task_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            if task_id is not None:
+                self._running[task_id] = task
 
-        async def _run_one(msg: IncomingMessage) -> None:
+    async def _run_one(self, pool: _Pool, msg: IncomingMessage, task_id: int | None) -> None:
+        completed = False
+        outcome = "reject"
+        in_flight = TASKS_IN_FLIGHT.labels(routing_key=msg.routing_key)
+        in_flight.inc()
+        started = time.perf_counter()
+        deadline = asyncio.get_running_loop().call_later(
+            pool.timeout, cancel_task, asyncio.current_task(), TIMEOUT
+        )
+        try:
+            # ignore_processed: a task interrupted by shutdown is nacked by hand below
+            async with msg.process(requeue=False, ignore_processed=True):
+                handler = HANDLERS.get(msg.routing_key)
+                if handler:
+                    try:
+                        async with profile_task(msg, task_id):
+                            await handler(msg.body)  # all handlers are async now
+                    except asyncio.CancelledError:
+                        reason = cancel_reason()
+                        if reason not in (REQUESTED, TIMEOUT, SHUTDOWN):
+                            raise
+                        asyncio.current_task().uncancel()
+                        if reason == TIMEOUT:
+                            outcome = "timeout"
+                            raise TimeoutError(f"{msg.routing_key} ran longer than {pool.timeout:g}s")
+                        if reason == SHUTDOWN:
+                            outcome = "requeue"
+                            await msg.nack(requeue=True)
+                        else:
+                            # canceled on request: the message is done with, ack it
+                            outcome = "cancelled"
+                            logger.info("Canceled task_id=%s on %s", task_id, msg.routing_key)
+                else:
+                    logger.info("no handler for %r: %r", msg.routing_key, msg.body)
+            completed = outcome != "requeue"
+            if outcome == "reject":
+                outcome = "ack"
+        except Exception as e:
+            # With process(requeue=False), failures are rejected (removed, no requeue).
+            logger.warning("Exception %r on %s: %r", e, msg.routing_key, msg.body)
+        finally:
+            deadline.cancel()
+            in_flight.dec()
+            HANDLER_SECONDS.labels(routing_key=msg.routing_key).observe(time.perf_counter() - started)
+            MESSAGES.labels(routing_key=msg.routing_key, outcome=outcome).inc()
+            pool.running -= 1
+            if task_id is not None:
+                self._running.pop(task_id, None)
+                self._dedup.release(task_id, completed=completed)
+            self._dispatch(pool)
+
+    async def _on_cancel(self, message: IncomingMessage) -> None:
+        async with message.process(requeue=False):
             try:
-                async with msg.process(requeue=False):
-                    handler = HANDLERS.get(msg.routing_key)
-                    if not handler:
-                        logger.info("no handler for %r: %r", msg.routing_key, msg.body)
-                        return
-                    await handler(msg.body)  # all handlers are async now
-            except Exception as e:
-                # With process(requeue=False), failures are rejected (removed, no requeue).
-                logger.warning("Exception %r on %s: %r", e, msg.routing_key, msg.body)
-            finally:
-                self._sem.release()
-
-        task = asyncio.create_task(_run_one(message))
-        self._tasks.add(task)
-        task.add_done_callback(self._tasks.discard)
+                task_id = CancelSchema.model_validate_json(message.body).task_id
+            except ValidationError:
+                logger.error("%s body didn't validate: %r", CANCEL_ROUTING_KEY, message.body)
+                return
+
+            task = self._running.get(task_id)
+            if task is not None:
+                # stops at the handler's next await: before the next agent call or Google write
+                logger.info("Cancel requested for running task_id=%s", task_id)
+                cancel_task(task, REQUESTED)
+                return
+
+            self._cancelled[task_id] = None
+            while len(self._cancelled) > _CANCELLED_MAX_ENTRIES:
+                self._cancelled.popitem(last=False)
+            for pool in self._pools.values():
+                for entry in [e for e in pool.waiting if e[3] == task_id]:
+                    pool.waiting.remove(entry)
+                    heapq.heapify(pool.waiting)
+                    await self._skip_cancelled(entry[2], task_id)
+
+    async def _skip_cancelled(self, message: IncomingMessage, task_id: int) -> None:
+        """Settle a task that was canceled before it started."""
+        logger.info("Skipping canceled task_id=%s on %s", task_id, message.routing_key)
+        self._cancelled.pop(task_id, None)
+        self._dedup.release(task_id, completed=True)
+        MESSAGES.labels(routing_key=message.routing_key, outcome="cancelled").inc()
+        with suppress(Exception):
+            await message.ack()
+        mark_canceled(task_id)
+
+    async def _requeue_waiting(self) -> None:
+        """Hand prefetched-but-unstarted messages back to the broker."""
+        for pool in self._pools.values():
+            while pool.waiting:
+                message, task_id = pool.pop()
+                if task_id is not None:
+                    self._dedup.release(task_id, completed=False)
+                with suppress(Exception):
+                    await message.nack(requeue=True)
+
+    async def _drain(self) -> None:
+        """
+        Let in-flight tasks finish until the drain deadline, then cancel the rest.
+        Cancelled ones nack their message for requeue so no work is lost when
+        the container is replaced.
+        """
+        if not self._tasks:
+            return
+        outbox_reserve = settings.WORKER_OUTBOX_DRAIN_SECONDS
+        drain = self._remaining(_UNWIND_SECONDS + outbox_reserve)
+        logger.info("Waiting up to %.0fs for %d in-flight task(s) to finish…", drain, len(self._tasks))
+        _, pending = await asyncio.wait(set(self._tasks), timeout=drain)
+        if not pending:
+            return
+        logger.warning("Drain deadline reached; requeueing %d unfinished task(s)", len(pending))
+        for task in pending:
+            cancel_task(task, SHUTDOWN)
+        _, stuck = await asyncio.wait(pending, timeout=min(_UNWIND_SECONDS, self._remaining(outbox_reserve)))
+        if stuck:
+            logger.error("%d task(s) didn't unwind after cancellation", len(stuck))
 
     async def run(self) -> None:
+        # route stray run_in_executor(None, ...) calls to the same bounded pool
+        asyncio.get_running_loop().set_default_executor(get_executor())
         await self.connect()
-        assert self._queue is not None
+        get_outbox()  # replays callbacks a previous run couldn't deliver
         self._install_signal_handlers()
 
-        consume_tag = await self._queue.consume(self._on_message, no_ack=False)
+        metrics_server = await start_metrics_server(self.metrics_port) if self.metrics_port else None
+        lag_monitor = asyncio.create_task(LoopMonitor().run())
+
+        for pool in self._pools.values():
+            assert pool.queue is not None
+            pool.consume_tag = await pool.queue.consume(partial(self._on_message, pool), no_ack=False)
+        cancel_tag = await self._cancel_queue.consume(self._on_cancel, no_ack=False)
 
         try:
             await self._stopping.wait()
         finally:
+            if self._deadline is None:  # exiting without stop(), e.g. on an error
+                self._deadline = time.monotonic() + self.shutdown_seconds
             # stop delivering new messages
             with suppress(Exception):
-                await self._queue.cancel(consume_tag)
+                await self._cancel_queue.cancel(cancel_tag)
+            for pool in self._pools.values():
+                with suppress(Exception):
+                    await pool.queue.cancel(pool.consume_tag)
+
+            await self._requeue_waiting()
 
-            # wait for in-flight tasks to finish (bounded by a timeout if you prefer)
-            if self._tasks:
-                logger.info("Waiting for %d in-flight task(s) to finish…", len(self._tasks))
-                await asyncio.gather(*self._tasks, return_exceptions=True)
+            await self._drain()
 
+            lag_monitor.cancel()
+            if metrics_server is not None:
+                metrics_server.close()
             await self.close()
+            # whatever's left of the budget; undelivered callbacks replay on restart
+            await close_outbox(self._remaining())
+            await close_client()
+            shutdown_executor(wait=False)
 
 
 async def main() -> None: